@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Compares the recursive list based flatten (previous implementation), `Config.iter_flatten` and `Config.flatten`
+on a deep and wide synthetic configuration. `flatten` results are only cached for frozen configurations.
+
+Usage: python -m benchmarks.bench_flatten [depth] [width]
+"""
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+import yaml
+
+from lincolntools.config import Config
+
+
+def generate_conf(depth: int = 6, width: int = 6) -> dict:
+    """ Builds a tree of `width ** depth` leaves, with a small list at each leaf. """
+    if depth == 0:
+        return {'value': 1, 'items': [1, 2, 3]}
+    return {'key_{}'.format(i): generate_conf(depth - 1, width) for i in range(width)}
+
+
+def recursive_flatten(keys: list, values) -> list:
+    """ Previous implementation of `Config._flatten`, kept as reference. """
+    flatten_list = []
+    if isinstance(values, dict):
+        for key, value in values.items():
+            if key.startswith('_'):
+                continue
+            flatten_list += recursive_flatten(keys + [key], value)
+    elif isinstance(values, list):
+        for key, value in enumerate(values):
+            flatten_list += recursive_flatten(keys + [str(key)], value)
+    else:
+        flatten_list += [('-'.join(keys), values)]
+    return flatten_list
+
+
+def main(depth: int = 6, width: int = 6):
+    Config.clear()
+    config = Config()
+    config['root'] = generate_conf(depth, width)
+    assert dict(recursive_flatten([], config.conf)) == config.flatten()
+    with tempfile.TemporaryDirectory() as folder:
+        file_path = os.path.join(folder, 'conf.yaml')
+        with open(file_path, 'w') as stream:
+            yaml.safe_dump({'root': config.conf['root']}, stream)
+        frozen = Config(file_path, frozen=True, name='frozen')
+    assert frozen.flatten() == config.flatten()
+
+    cases = [
+        ('recursive lists (previous)', lambda: dict(recursive_flatten([], config.conf))),
+        ('iter_flatten', lambda: dict(config.iter_flatten())),
+        ('iter_flatten with prefix', lambda: dict(config.iter_flatten(prefix='root-key_0-key_1'))),
+        ('flatten', lambda: config.flatten()),
+        ('flatten (frozen, cached)', lambda: frozen.flatten()),
+    ]
+    print('depth {}, width {}: {} flattened keys'.format(depth, width, len(config.flatten())))
+    print('{:<28} {:>10} {:>16}'.format('', 'time (ms)', 'peak memory (MB)'))
+    for name, function in cases:
+        duration = min(timeit.repeat(function, number=3, repeat=3)) / 3
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('{:<28} {:>10.2f} {:>16.1f}'.format(name, duration * 1000, peak / 2 ** 20))
+    Config.clear()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Compares the memory used by the `EasyDict` and `FrozenDict` representations of a configuration.
+
+Usage: python -m benchmarks.bench_frozen_memory [nb_sections] [nb_keys]
+"""
+import sys
+import time
+import tracemalloc
+
+from easydict import EasyDict
+from lincolntools.config.frozen import freeze
+
+
+def generate_conf(nb_sections: int = 500, nb_keys: int = 50) -> dict:
+    """ Builds a configuration with `nb_sections` sections of `nb_keys` small sub-sections. """
+    return {
+        'section_{}'.format(i): {
+            'key_{}'.format(k): {'value': k, 'name': 'text_{}'.format(k), 'ratio': k / 10, 'items': [1, 2, 3]}
+            for k in range(nb_keys)
+        }
+        for i in range(nb_sections)
+    }
+
+
+def measure(function, conf: dict) -> tuple:
+    """ Returns the duration and the memory allocated (and still used) by `function(conf)`. """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(conf)
+    duration = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return duration, size
+
+
+def main(nb_sections: int = 500, nb_keys: int = 50):
+    conf = generate_conf(nb_sections, nb_keys)
+    print('{} sections x {} keys'.format(nb_sections, nb_keys))
+    print('{:<10} {:>10} {:>12}'.format('', 'time (s)', 'memory (MB)'))
+    results = {}
+    for name, function in (('EasyDict', EasyDict), ('FrozenDict', freeze)):
+        duration, size = measure(function, conf)
+        results[name] = size
+        print('{:<10} {:>10.3f} {:>12.1f}'.format(name, duration, size / 2 ** 20))
+    print('FrozenDict uses {:.0%} of the EasyDict memory'.format(results['FrozenDict'] / results['EasyDict']))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Measures the scaling of `ConfigLoader.load_from_folder_parallel` on a synthetic tree of YAML files.
+
+Usage: python -m benchmarks.bench_parallel_load [nb_files] [max_workers ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from lincolntools.config import ConfigLoader
+
+
+def generate_tree(root: str, nb_files: int = 1000, nb_keys: int = 50):
+    """ Writes `nb_files` YAML files, each defining its own top-level section, in 10 sub-folders. """
+    for i in range(nb_files):
+        folder = os.path.join(root, 'part_{}'.format(i % 10))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, 'section_{:05d}.yaml'.format(i)), 'w') as stream:
+            stream.write('section_{}:\n'.format(i))
+            for k in range(nb_keys):
+                stream.write('    key_{k}:\n        value: {k}\n        name: text_{k}\n        ratio: {r}\n        items: [1, 2, 3]\n'.format(k=k, r=k / 10))
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main(nb_files: int = 1000, *workers):
+    workers = workers or sorted({1, 2, 4, os.cpu_count() or 1})
+    with tempfile.TemporaryDirectory() as root:
+        generate_tree(root, nb_files)
+        serial = timed(ConfigLoader.load_from_folder, root, concatenate=False)
+        print('{} files, {} processors'.format(nb_files, os.cpu_count()))
+        print('{:<28} {:>9.3f}s'.format('serial (concatenate=False)', serial))
+        for max_workers in workers:
+            duration = timed(ConfigLoader.load_from_folder_parallel, root, max_workers=max_workers)
+            print('{:<28} {:>9.3f}s {:>6.2f}x'.format('parallel, {} workers'.format(max_workers), duration, serial / duration))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Compares the pure-Python and libyaml based loaders on the test configuration files.
+
+Usage: python -m benchmarks.bench_yaml_loader [repeat]
+"""
+import glob
+import io
+import os
+import sys
+import timeit
+
+from lincolntools.config.config_loader import ConfigLoader, PyYamlLoader, CYamlLoader
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'data', 'configs')
+
+
+def main(repeat: int = 200):
+    if CYamlLoader is None:
+        print('libyaml is not available, nothing to compare.')
+        return 1
+    os.environ.setdefault('ENV_VALUE_TEST', 'test')
+    files = sorted(glob.glob(os.path.join(DATA_DIR, '**', '*.yaml'), recursive=True))
+    contents = {}
+    for f in files:
+        with open(f) as stream:
+            contents[f] = stream.read()
+    # Files without anchors nested under distinct sections make a bigger document, closer to a real configuration
+    plain_files = [f for f in files if not set('&*') & set(contents[f])]
+    big_document = ''.join(
+        'section_{}:\n'.format(i) + ''.join('    ' + line + '\n' for line in contents[f].splitlines())
+        for i in range(50) for f in plain_files
+    )
+
+    samples = [(os.path.relpath(f, DATA_DIR), contents[f]) for f in files if 'concat' not in f]
+    samples.append(('<files without anchors x50>', big_document))
+    print('{:<45} {:>12} {:>12} {:>8}'.format('file', 'python (ms)', 'libyaml (ms)', 'speedup'))
+    for name, content in samples:
+        results = {}
+        for loader_class in (PyYamlLoader, CYamlLoader):
+            results[loader_class] = ConfigLoader.read_yaml_stream(io.StringIO(content), loader_class=loader_class)
+        if results[PyYamlLoader] != results[CYamlLoader]:
+            print('{}: outputs differ'.format(name))
+            return 1
+        number = max(1, repeat // 50) if name.startswith('<') else repeat
+        timings = [
+            min(timeit.repeat(lambda: ConfigLoader.read_yaml_stream(io.StringIO(content), loader_class=loader_class),
+                              number=number, repeat=3)) / number * 1000
+            for loader_class in (PyYamlLoader, CYamlLoader)
+        ]
+        print('{:<45} {:>12.3f} {:>12.3f} {:>7.1f}x'.format(name, timings[0], timings[1], timings[0] / timings[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Synthetic configurations used by the benchmarks.
+
+`write_*` functions write YAML files in a folder and return the path to load.
+"""
+import os
+
+#: str: Prefix of the environment variables referenced by `write_many_env_vars`
+ENV_PREFIX = 'LTC_BENCH_VAR_'
+
+
+def section(index: int) -> dict:
+    """ Returns a small section with the usual value types. """
+    return {'value': index, 'name': 'text_{}'.format(index), 'ratio': index / 10, 'enabled': index % 2 == 0, 'items': [1, 2, 3]}
+
+
+def write_yaml(file_path: str, lines):
+    """ Writes YAML lines in a file, creating its folder if needed. """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as stream:
+        for line in lines:
+            stream.write(line)
+            stream.write('\n')
+    return file_path
+
+
+def write_wide(root: str, nb_keys: int = 20000) -> str:
+    """ Single file with `nb_keys` top-level sections. """
+    lines = []
+    for i in range(nb_keys):
+        lines.append('key_{}:'.format(i))
+        lines.extend('    {}: {}'.format(k, v) for k, v in section(i).items())
+    return write_yaml(os.path.join(root, 'wide', 'wide.yaml'), lines)
+
+
+def write_deep(root: str, depth: int = 8, width: int = 3) -> str:
+    """ Single file with a tree of `width ** depth` leaves. """
+    lines = []
+
+    def add(level, indent):
+        for i in range(width):
+            if level == depth:
+                lines.append('{}leaf_{}: {}'.format(indent, i, i))
+            else:
+                lines.append('{}level{}_{}:'.format(indent, level, i))
+                add(level + 1, indent + '  ')
+
+    add(1, '')
+    return write_yaml(os.path.join(root, 'deep', 'deep.yaml'), lines)
+
+
+def write_many_files(root: str, nb_files: int = 500, nb_keys: int = 20) -> str:
+    """ Folder of `nb_files` YAML files in 10 sub-folders, each defining its own top-level section. """
+    folder = os.path.join(root, 'many_files')
+    for i in range(nb_files):
+        lines = ['section_{}:'.format(i)]
+        for k in range(nb_keys):
+            lines.append('    key_{}:'.format(k))
+            lines.extend('        {}: {}'.format(name, value) for name, value in section(k).items())
+        write_yaml(os.path.join(folder, 'part_{}'.format(i % 10), 'section_{:05d}.yaml'.format(i)), lines)
+    return folder
+
+
+def write_many_env_vars(root: str, nb_values: int = 10000, nb_variables: int = 50) -> str:
+    """ Single file with `nb_values` values referencing `nb_variables` environment variables (see `set_env_vars`). """
+    lines = ['paths:']
+    for i in range(nb_values):
+        variable = '{}{}'.format(ENV_PREFIX, i % nb_variables)
+        if i % 3 == 0:
+            lines.append('    path_{i}: ${{{var}}}/data/{i}'.format(i=i, var=variable))
+        elif i % 3 == 1:
+            lines.append('    path_{i}: ${{{var}_MISSING:-/default}}/${{{var}}}'.format(i=i, var=variable))
+        else:
+            lines.append('    path_{i}: ${{config:paths.path_0}}/{i}'.format(i=i))
+    return write_yaml(os.path.join(root, 'env_vars', 'env_vars.yaml'), lines)
+
+
+def set_env_vars(nb_variables: int = 50):
+    """ Sets the environment variables referenced by `write_many_env_vars`. """
+    for i in range(nb_variables):
+        os.environ['{}{}'.format(ENV_PREFIX, i)] = '/var/{}'.format(i)
+
+
+def write_large_lists(root: str, nb_lists: int = 20, length: int = 5000) -> str:
+    """ Single file with `nb_lists` lists of `length` elements, alternately scalars and small mappings. """
+    lines = []
+    for i in range(nb_lists):
+        lines.append('list_{}:'.format(i))
+        for k in range(length):
+            if k % 2:
+                lines.append('    - {{id: {k}, name: item_{k}}}'.format(k=k))
+            else:
+                lines.append('    - item_{}'.format(k))
+    return write_yaml(os.path.join(root, 'large_lists', 'large_lists.yaml'), lines)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite: time and peak memory of the package import, and of loading, key lookups, flatten and dump
+on synthetic configurations.
+
+Results can be saved as a baseline (JSON) and later runs compared with it: the command fails (exit code 1)
+when an operation is slower, or uses more memory, than its baseline beyond a threshold.
+Baselines depend on the machine: save them on the machine used for the comparisons.
+
+Usage:
+    python -m benchmarks.suite                          # print the results
+    python -m benchmarks.suite --save                   # save them as the baseline
+    python -m benchmarks.suite --check --threshold 0.2  # fail on a regression of more than 20%
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lincolntools.config import Config, ConfigLoader
+from . import generators
+
+#: str: Default path of the baseline file
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+#: dict: Generator of each scenario and its arguments, full size and quick size
+SCENARIOS = {
+    'wide': (generators.write_wide, {'nb_keys': 20000}, {'nb_keys': 2000}),
+    'deep': (generators.write_deep, {'depth': 8, 'width': 3}, {'depth': 6, 'width': 3}),
+    'many_files': (generators.write_many_files, {'nb_files': 500}, {'nb_files': 50}),
+    'many_env_vars': (generators.write_many_env_vars, {'nb_values': 10000}, {'nb_values': 1000}),
+    'large_lists': (generators.write_large_lists, {'nb_lists': 20, 'length': 5000}, {'nb_lists': 5, 'length': 1000}),
+}
+
+
+#: str: Code run in a new interpreter to measure the import of the package, prints the duration and the peak memory
+IMPORT_CODE = """
+import time, tracemalloc
+{trace}
+start = time.perf_counter()
+import lincolntools.config
+print(time.perf_counter() - start, tracemalloc.get_traced_memory()[1])
+"""
+
+
+def measure(function, repeat: int = 3) -> dict:
+    """ Measures a function: best duration over `repeat` runs, then peak memory allocated during one more run.
+
+    Returns:
+        dict: {'time': seconds, 'peak': bytes}
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'time': min(durations), 'peak': peak}
+
+
+def measure_import(repeat: int = 3) -> dict:
+    """ Measures the import of `lincolntools.config` in new interpreters, like `measure`. """
+    def run_import(trace):
+        code = IMPORT_CODE.format(trace='tracemalloc.start()' if trace else '')
+        output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+        duration, peak = output.split()
+        return float(duration), int(peak)
+
+    durations = [run_import(False)[0] for _ in range(repeat)]
+    return {'time': min(durations), 'peak': run_import(True)[1]}
+
+
+def run_scenario(path: str, repeat: int = 3) -> dict:
+    """ Measures every operation on a configuration file/folder. """
+    results = {'load': measure(lambda: ConfigLoader.load(path), repeat)}
+    Config.clear()
+    config = Config(path)
+    paths = [key for key, _ in config.iter_flatten(sep='.')]
+    # Spread over the whole configuration, at most 1000 paths
+    paths = paths[::max(1, len(paths) // 1000)]
+    top_level = [key for key in config.conf if not key.startswith('_')]
+    results['lookup_path'] = measure(lambda: [config.get_path(p) for p in paths], repeat)
+    results['lookup_key'] = measure(lambda: [config[key] for key in top_level], repeat)
+    results['get_many'] = measure(lambda: config.get_many(paths), repeat)
+    results['project'] = measure(lambda: config.project(paths), repeat)
+    results['flatten'] = measure(lambda: dict(config.iter_flatten()), repeat)
+    results['dump'] = measure(lambda: config.dump(), repeat)
+    Config.clear()
+    return results
+
+
+def run(scenarios: list = None, quick: bool = False, repeat: int = 3) -> dict:
+    """ Runs the benchmarks.
+
+    Args:
+        scenarios (list, optional): Names of the scenarios to run, `import` for the package import. Defaults to None (all).
+        quick (bool, optional): Use smaller configurations. Defaults to False.
+        repeat (int, optional): Number of timed runs of each operation. Defaults to 3.
+    Returns:
+        dict: {'scenario/operation': {'time': seconds, 'peak': bytes}}
+    """
+    scenarios = scenarios or ['import'] + list(SCENARIOS)
+    results = {}
+    if 'import' in scenarios:
+        results['import/lincolntools.config'] = measure_import(repeat)
+    generators.set_env_vars()
+    with tempfile.TemporaryDirectory() as root:
+        for name in scenarios:
+            if name == 'import':
+                continue
+            generator, full_size, quick_size = SCENARIOS[name]
+            path = generator(root, **(quick_size if quick else full_size))
+            for operation, measures in run_scenario(path, repeat).items():
+                results['{}/{}'.format(name, operation)] = measures
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, memory_threshold: float) -> list:
+    """ Returns the description of each measure worse than its baseline beyond the thresholds (ex: 0.2 for 20%). """
+    regressions = []
+    for case, measures in sorted(results.items()):
+        reference = baseline.get(case)
+        if reference is None:
+            continue
+        for metric, limit in (('time', threshold), ('peak', memory_threshold)):
+            if reference[metric] and measures[metric] > reference[metric] * (1 + limit):
+                regressions.append('{case} {metric}: {value:.6g} > {reference:.6g} (+{ratio:.0%})'.format(
+                    case=case, metric=metric, value=measures[metric], reference=reference[metric],
+                    ratio=measures[metric] / reference[metric] - 1))
+    return regressions
+
+
+def format_results(results: dict, baseline: dict = None) -> str:
+    lines = ['{:<28} {:>11} {:>10} {:>11} {:>10}'.format('case', 'time (ms)', 'vs base', 'peak (MB)', 'vs base')]
+    for case, measures in results.items():
+        reference = (baseline or {}).get(case)
+        ratios = ['{:+.0%}'.format(measures[m] / reference[m] - 1) if reference and reference[m] else '' for m in ('time', 'peak')]
+        lines.append('{:<28} {:>11.3f} {:>10} {:>11.2f} {:>10}'.format(
+            case, measures['time'] * 1000, ratios[0], measures['peak'] / 2 ** 20, ratios[1]))
+    return '\n'.join(lines)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    parser.add_argument('scenarios', nargs='*', help='scenarios to run, among import, {} (default: all)'.format(', '.join(SCENARIOS)))
+    parser.add_argument('--quick', action='store_true', help='use smaller configurations')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each operation')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='path to the baseline file')
+    parser.add_argument('--save', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--check', action='store_true', help='fail if an operation regressed beyond the thresholds')
+    parser.add_argument('--threshold', type=float, default=0.2, help='accepted time increase (default: 0.2 for 20%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.1, help='accepted peak memory increase (default: 0.1)')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS) - {'import'}
+    if unknown:
+        parser.error('unknown scenarios: {}'.format(', '.join(sorted(unknown))))
+
+    baseline = None
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as stream:
+            stored = json.load(stream)
+        # Quick and full runs are not comparable
+        if stored.get('quick') == args.quick:
+            baseline = stored['results']
+
+    results = run(args.scenarios, quick=args.quick, repeat=args.repeat)
+    print(format_results(results, baseline))
+
+    if args.save:
+        with open(args.baseline, 'w') as stream:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'quick': args.quick,
+                       'results': results}, stream, indent=2, sort_keys=True)
+        print('Baseline saved in {}'.format(args.baseline))
+    if args.check:
+        if baseline is None:
+            print('No baseline to compare with in {}'.format(args.baseline))
+            return 1
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        if regressions:
+            print('Regressions:\n' + '\n'.join(regressions))
+            return 1
+        print('No regression.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
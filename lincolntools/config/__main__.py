@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Command line tools: `python -m lincolntools.config profile <path>` prints where the loading time goes."""
+import argparse
+import json
+import sys
+from .config import Config
+
+
+def profile(args) -> int:
+    """ Loads a configuration with profiling enabled and prints the time of each phase and the size of each file. """
+    for _ in range(args.repeat):
+        Config.clear()
+        config = Config(args.path, cache_dir=args.cache_dir, frozen=args.frozen, deferred=args.deferred,
+                        schema=args.schema, profile=True)
+        measures = config.last_profile
+        Config.clear()
+        if args.json:
+            print(json.dumps(measures.as_dict(), sort_keys=True))
+        else:
+            print(measures.format())
+    return 0
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m lincolntools.config')
+    commands = parser.add_subparsers(dest='command')
+    profile_parser = commands.add_parser('profile', help='print the time spent in each phase of the loading')
+    profile_parser.add_argument('path', help='configuration file or folder')
+    profile_parser.add_argument('--cache-dir', help='folder of the compiled cache')
+    profile_parser.add_argument('--schema', help='schema or template file to validate the configuration with')
+    profile_parser.add_argument('--frozen', action='store_true', help='load a read-only FrozenDict')
+    profile_parser.add_argument('--deferred', action='store_true', help='resolve the references on first access')
+    profile_parser.add_argument('--repeat', type=int, default=1, help='number of loads (ex: to see the effect of the cache)')
+    profile_parser.add_argument('--json', action='store_true', help='print the measures as JSON')
+    args = parser.parse_args(argv)
+    if args.command == 'profile':
+        return profile(args)
+    parser.print_help()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+import os
+import pickle
+import stat
+from . import discovery
+
+LOGGER = logging.getLogger(__name__)
+
+
+def is_trusted(path, owners: tuple = None) -> bool:
+    """ Returns True if a file/folder can be trusted with pickled data: it belongs to the current user (or one of
+    `owners`) and neither its group nor other users can write to it. Always True on platforms without file ownership (Windows).
+
+    Args:
+        path (str or int): Path to file/folder, or descriptor of an open file.
+        owners (tuple, optional): Ids of the users allowed to own it. Defaults to the current user only.
+    Returns:
+        bool: True if only the trusted users can have written the content.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    status = os.stat(path)
+    if owners is None:
+        owners = (os.getuid(),)
+    return status.st_uid in owners and not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class ConfigCache():
+    """On-disk cache of parsed configuration trees.
+
+    Each entry is keyed on the configuration path and records, for every source file, its path, size,
+    modification time and content hash. An entry is only returned when none of its source files changed.
+
+    Entries are pickled: the cache folder is created readable by the current user only, and entries are not
+    loaded from a folder (or file) which belongs to another user or which other users can write to.
+    """
+    #: int: Version of the cache entries layout. Entries written with another version are ignored.
+    FORMAT_VERSION = 1
+    #: str: Extension of the cache entries files
+    EXTENSION = '.cache'
+
+    def __init__(self, cache_dir: str):
+        """Constructor of the ConfigCache object.
+
+        Args:
+            cache_dir (str): Path to the folder where cache entries are stored. Created if needed, with mode 0o700.
+        """
+        #: str: path to the folder which contains the cache entries
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """ Computes the hash of the content of a file.
+
+        Args:
+            file_path (str): Path to file.
+        Returns:
+            str: Hexadecimal SHA-1 digest of the file content.
+        """
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as stream:
+            for chunk in iter(lambda: stream.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_stamp(file_path: str) -> list:
+        """ Returns the cheap identity of a file: its path, size and modification time. """
+        return [file_path] + list(discovery.file_stamp(file_path))
+
+    @staticmethod
+    def read_source(file_path: str) -> tuple:
+        """ Reads a source file along with its identity, taken with the read: if the file is modified meanwhile,
+        the stamp is older than the content and the next `get` compares the hash of the content which was read.
+
+        Args:
+            file_path (str): Path to file.
+        Returns:
+            tuple: Stamp of the file (path, size, modification time, hash of the content) and its content (bytes).
+        """
+        with open(file_path, 'rb') as stream:
+            status = os.fstat(stream.fileno())
+            content = stream.read()
+        return [file_path, status.st_size, status.st_mtime_ns, hashlib.sha1(content).hexdigest()], content
+
+    def entry_path(self, key: str) -> str:
+        """ Returns the path of the cache entry associated to a key. """
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + ConfigCache.EXTENSION)
+
+    def get(self, key: str, sources: list) -> object:
+        """ Returns the cached tree associated to a key if all its source files are unchanged.
+
+        Files whose size or modification time changed are hashed: if their content is the same, the entry
+        is still valid and its stamps are refreshed.
+
+        Args:
+            key (str): Identifier of the entry.
+            sources (list): Paths of the files the tree is built from, in loading order.
+        Returns:
+            object: The cached tree, or None if there is no valid entry.
+        """
+        entry_path = self.entry_path(key)
+        if not os.path.isfile(entry_path):
+            return None
+        if not (is_trusted(self.cache_dir) and is_trusted(entry_path)):
+            LOGGER.warning('Cache entry %s is ignored: it can be written by other users.', entry_path)
+            return None
+        try:
+            with open(entry_path, 'rb') as stream:
+                entry = pickle.load(stream)
+        except Exception:
+            LOGGER.warning('Unreadable cache entry %s, it will be rebuilt.', entry_path, exc_info=True)
+            return None
+
+        if entry.get('format') != ConfigCache.FORMAT_VERSION or entry.get('key') != key:
+            return None
+        files = entry['files']
+        if [f[0] for f in files] != list(sources):
+            return None
+
+        refreshed = False
+        for cached in files:
+            try:
+                stamp = ConfigCache.file_stamp(cached[0])
+            except OSError:
+                return None
+            if stamp == cached[:3]:
+                continue
+            if stamp[1] != cached[1] or ConfigCache.file_digest(cached[0]) != cached[3]:
+                LOGGER.info('Configuration file %s changed, cache entry is outdated.', cached[0])
+                return None
+            cached[:3] = stamp
+            refreshed = True
+
+        if refreshed:
+            self._write(entry_path, entry)
+        LOGGER.info('Configuration loaded from cache entry %s', entry_path)
+        return pickle.loads(entry['tree'])
+
+    def put(self, key: str, sources: list, tree: object, stamps: list = None):
+        """ Stores a tree in the cache.
+
+        Args:
+            key (str): Identifier of the entry.
+            sources (list): Paths of the files the tree is built from, in loading order.
+            tree (object): Parsed configuration tree. It must be picklable.
+            stamps (list, optional): Stamps of the sources returned by `read_source` along with the content which was parsed.
+                Defaults to None: the files are stamped and hashed now, they must not have changed since they were parsed.
+        """
+        if stamps is None:
+            stamps = [ConfigCache.file_stamp(path) + [ConfigCache.file_digest(path)] for path in sources]
+        files = [list(stamp) for stamp in stamps]
+        entry = {
+            'format': ConfigCache.FORMAT_VERSION,
+            'key': key,
+            'files': files,
+            # The tree is pickled separately so that checking an entry does not unpickle it
+            'tree': pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL),
+        }
+        self._write(self.entry_path(key), entry)
+
+    def clear(self):
+        """ Removes every entry of the cache. """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ConfigCache.EXTENSION):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _write(self, entry_path: str, entry: dict):
+        # Written in a temporary file then renamed: concurrent readers never see a partial entry
+        tmp_path = '{path}.{pid}.tmp'.format(path=entry_path, pid=os.getpid())
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            if not is_trusted(self.cache_dir):
+                LOGGER.warning('Cache entry %s is not written: %s can be written by other users.', entry_path, self.cache_dir)
+                return
+            with open(tmp_path, 'wb') as stream:
+                pickle.dump(entry, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            LOGGER.warning('Unable to write cache entry %s', entry_path, exc_info=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -1,91 +1,569 @@
 # -*- coding: utf-8 -*-
-from .config_loader import ConfigLoader
+from .config_loader import ConfigLoader, _running_loop
+from .frozen import FrozenDict, freeze, thaw
+from . import instrumentation
+from .incremental import IncrementalLoader
+from .layers import LayeredConfig
+from .lazy import LazyConfig
+from .registry import DEFAULT_MAX_SIZE, InstanceRegistry
+from .schema import Schema
+from .shared import SharedConfig, publish
+from .watcher import ConfigWatcher
+from easydict import EasyDict
+import functools
 import logging
+import threading
+from collections.abc import Mapping
 import yaml
-import json
 import os
 # import glob
 
 LOGGER = logging.getLogger(__name__)
 
+_MISSING = object()
+
+#: type: YAML dumper used by `Config.dump`, the libyaml based one when available
+YamlDumper = yaml.CSafeDumper if yaml.__with_libyaml__ else yaml.SafeDumper
+
 
 class Config():
     _instance = None
+    # Held while the instance is created or cleared
+    _instance_lock = threading.RLock()
+    #: tuple: formats supported by `dump`
+    DUMP_FORMATS = ('yaml', 'json', 'msgpack')
+    #: str: name of the layer, on top of the files, which holds the overrides of `set_override`
+    RUNTIME_LAYER = 'runtime'
+    #: InstanceRegistry: named instances returned by `get_instance(name=...)`, at most `DEFAULT_MAX_SIZE` (128) by default.
+    #: Its limits can be changed (ex: `Config.registry.max_size = 1000`) or it can be replaced
+    #: (ex: `Config.registry = InstanceRegistry(max_size=100, ttl=600)`).
+    registry = InstanceRegistry(max_size=DEFAULT_MAX_SIZE)
 
     @staticmethod
-    def get_instance(cfg_path: str = None) -> 'Config':
+    def get_instance(cfg_path: str = None, name: str = None, **kwargs) -> 'Config':
         """Function which return the current instance. 
         If it doesn't exists, a new instance is initialized using the default values.
+        Thread-safe: when several threads ask for the instance at the same time, it is created (loaded) once.
 
+        Args:
+            cfg_path (str, optional): The path to configuration file/folder. Defaults to None.
+            name (str, optional): Name of an instance of `Config.registry` (ex: a tenant) instead of the singleton.
+                It is loaded from `cfg_path` if it is not registered (or was evicted). Defaults to None.
+            kwargs: Loading options given to the constructor if the instance is created.
         Returns:
-            Config: Config singleton.
+            Config: Config singleton, or the named instance.
+        """
+        if name is not None:
+            return Config.registry.get(name, functools.partial(Config, cfg_path, name=name, **kwargs))
+        # Double-checked locking: no lock once the instance exists
+        instance = Config._instance
+        if instance is None:
+            with Config._instance_lock:
+                instance = Config._instance
+                if instance is None:
+                    instance = Config(cfg_path, **kwargs)
+        return instance
+
+    @staticmethod
+    async def aget_instance(cfg_path: str = None, name: str = None, **kwargs) -> 'Config':
+        """Coroutine version of `get_instance()`: if the instance has to be created, the configuration
+        is loaded in the default executor of the event loop, which is not blocked by the file reads and parsing.
+
+        Args:
+            cfg_path (str, optional): The path to configuration file/folder. Defaults to None.
+            name (str, optional): Name of an instance of `Config.registry` instead of the singleton. Defaults to None.
+            kwargs: Loading options given to the constructor if the instance is created.
+        Returns:
+            Config: Config singleton, or the named instance.
         """
-        if Config._instance is None:
-            Config(cfg_path)
-        return Config._instance
+        instance = Config._instance if name is None else Config.registry.peek(name)
+        if instance is None:
+            loop = _running_loop()
+            instance = await loop.run_in_executor(None, functools.partial(Config.get_instance, cfg_path, name=name, **kwargs))
+        return instance
 
     @staticmethod
-    def get(cfg_path: str = None) -> 'Config':
+    def get(cfg_path: str = None, **kwargs) -> 'Config':
         """Alias of `get_instance()`
 
         Returns:
             Config: Config singleton.
         """
-        return Config.get_instance(cfg_path)
+        return Config.get_instance(cfg_path, **kwargs)
 
     @staticmethod
     def clear():
         """Config instance reinitialization."""
-        Config._instance = None
+        with Config._instance_lock:
+            if Config._instance is not None:
+                Config._instance.stop_watching()
+            Config._instance = None
 
-    def dump(self, filename: str = None) -> str:
+    def dump(self, filename: str = None, stream=None, fmt: str = 'yaml') -> str:
         """ Creates a string dump of the current configuration. 
         It can produce a YAML file which contains the dumped whole configuration.
+        The configuration is walked once to get plain Python types, then serialized with the fastest available
+        serializer (libyaml based YAML emitter when available).
 
 
         Args:
             filename (str) : Absolute path to destination file. 
+            stream (file object, optional): Open file (text mode, binary mode for msgpack) in which the dump is written
+                as it is serialized. No string is built and None is returned.
+            fmt (str, optional): Output format: `yaml`, `json` or `msgpack` (requires the `msgpack` package). Defaults to `yaml`.
         Returns:
-            str: String value which is the dump of the Config object.
+            str: String value which is the dump of the Config object (bytes for msgpack).
 
+        Raises:
+            ValueError: Raised if the format is unknown.
         """
-        self.conf['_version'] += 1
-        dump_string = yaml.dump(json.loads(json.dumps(self.conf)), default_flow_style=False)
+        if fmt not in Config.DUMP_FORMATS:
+            raise ValueError('Unknown dump format {fmt}, expected one of {formats}'.format(fmt=fmt, formats=Config.DUMP_FORMATS))
+        with self._reload_lock:
+            self.conf = Config._set_version(Config._copy(self.conf), self.conf['_version'] + 1)
+        conf = thaw(self.conf)
+        if stream is not None:
+            Config._serialize(conf, fmt, stream)
+            return None
+        dump_string = Config._serialize(conf, fmt)
         if filename is not None:
-            with open(filename, 'w') as f:
+            with open(filename, 'wb' if fmt == 'msgpack' else 'w') as f:
                 f.write(dump_string)
         return dump_string
 
-    def __init__(self, cfg_path: str = None):
+    @staticmethod
+    def _serialize(conf: dict, fmt: str, stream=None):
+        if fmt == 'yaml':
+            return yaml.dump(conf, stream, Dumper=YamlDumper, default_flow_style=False)
+        if fmt == 'json':
+            import json
+            if stream is None:
+                return json.dumps(conf, sort_keys=True, default=str)
+            return json.dump(conf, stream, sort_keys=True, default=str)
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError('The msgpack package is required to dump the configuration as msgpack.') from None
+        packed = msgpack.packb(conf, default=str, use_bin_type=True)
+        if stream is None:
+            return packed
+        stream.write(packed)
+
+    def __init__(self, cfg_path: str = None, cache_dir: str = None, incremental: bool = False, frozen: bool = False, lazy: bool = False,
+                 schema=None, deferred: bool = False, shared_path: str = None, profile: bool = False, layers: list = None,
+                 name: str = None):
         """Constructor of the Config object.
 
         Args:
             cfg_path (str, optional): The path to configuration file/folder. Defaults to None.
+            cache_dir (str, optional): Folder of the compiled cache used to skip YAML parsing when files are unchanged. Defaults to None (no cache).
+            incremental (bool, optional): For folders, only parse again the files which changed on reload (see `IncrementalLoader`). Defaults to False.
+            frozen (bool, optional): Keep the configuration as a read-only `FrozenDict`, lighter than the default `EasyDict`. Defaults to False.
+            lazy (bool, optional): For folders, only parse a file when one of its top-level keys is accessed (see `LazyConfig`). Defaults to False.
+            schema (Schema or str, optional): Schema (or path to a schema/template file) checked at each load. Defaults to None.
+            deferred (bool, optional): Resolve the references (`${VAR}`, ...) on first access instead of at load (see `DeferredDict`).
+                The parsed tree, which may come from the cache, is not bound to the environment. Defaults to False.
+            shared_path (str, optional): Attach the configuration published at this path by another process (see `publish`)
+                instead of loading `cfg_path`. Sections are decoded on first access. Defaults to None.
+            profile (bool, optional): Profile each load, see `last_profile`. Loads are also profiled when hooks
+                are registered with `instrumentation.add_hook`. Defaults to False.
+            layers (list, optional): Paths to configuration files/folders deep-merged over `cfg_path`, in increasing priority
+                (ex: environment overlay, local overrides). On reload, only the changed files are loaded again and only the
+                changed subtrees are merged again (see `LayeredConfig`). A `runtime` layer on top of them holds the overrides
+                of `set_override`. Only `cfg_path` is watched by `watch`. Defaults to None.
+            name (str, optional): Name of the instance, which is then not the singleton. Named instances are usually
+                created and kept by `get_instance(name=...)`. Defaults to None.
 
         Raises:
-            Exception: Raised if you try to create an instance if there is already one which exists.
+            Exception: Raised if you try to create an instance (without name) if there is already one which exists.
+            ValueError: Raised if both `incremental` and `lazy` are set, or if `deferred` is combined with `incremental`, `lazy` or `frozen`,
+                or if `shared_path` or `layers` is combined with `incremental`, `lazy` or `deferred`.
+            SchemaError: Raised if the configuration does not match the schema.
         """
         # If an instance already exists => Exception.
-        if Config._instance is not None:
+        if name is None and Config._instance is not None:
             raise Exception('Sorry but it is a singleton class!')
+        if incremental and lazy:
+            raise ValueError('incremental and lazy loadings cannot be combined.')
+        if deferred and (incremental or lazy or frozen):
+            raise ValueError('deferred interpolation cannot be combined with incremental, lazy or frozen configurations.')
+        if shared_path is not None and (incremental or lazy or deferred):
+            raise ValueError('shared configurations cannot be combined with incremental, lazy or deferred loadings.')
+        if layers and (incremental or lazy or deferred or shared_path is not None or cfg_path is None):
+            raise ValueError('layers need a cfg_path and cannot be combined with incremental, lazy, deferred or shared loadings.')
+        #: str: name of the instance in `Config.registry`, None for the singleton
+        self.name = name
         #: str: contains the path to a configuration file/folder
         self.config_path = None
+        #: str: folder of the compiled cache, None if the cache is disabled
+        self.cache_dir = cache_dir
+        #: bool: True if the configuration is a read-only `FrozenDict`
+        self.frozen = frozen
+        #: bool: True if the files of a folder are parsed on first access to their keys
+        self.lazy = lazy
+        #: bool: True if the references are resolved on first access
+        self.deferred = deferred
+        #: str: path to the published configuration this instance is attached to, None if it is loaded from `config_path`
+        self.shared_path = shared_path
+        #: bool: True if each load is profiled
+        self.profile = profile
+        #: LoadProfile: measures of the last profiled load (time of each phase, size of each file), None if there is none
+        self.last_profile = None
+        #: Schema: schema checked at each load, None if there is none
+        self.schema = Schema.from_file(schema) if isinstance(schema, str) else schema
         #: dict: Python `dict` which is the configuration object
-        self.conf = {}
-        if cfg_path is not None:
+        self.conf = FrozenDict() if frozen else {}
+        #: list: functions called with the Config object after each reload
+        self._callbacks = []
+        #: ConfigWatcher: watcher of the configuration files, None if the watch mode is off
+        self._watcher = None
+        # Serializes the replacements of `conf` (reload, copy-on-write updates)
+        self._reload_lock = threading.Lock()
+        #: IncrementalLoader: loader which keeps the parsed files between reloads, None if not incremental
+        self._incremental_loader = None
+        #: LayeredConfig: layers (`cfg_path`, `layers` then `runtime`) and their merged tree, None if there are no layers.
+        #: Use `set_override` and `unset_override` to update it, they publish the new configuration.
+        self.layered = None
+        #: tuple: (configuration, results of `flatten` indexed by arguments)
+        self._flatten_cache = None
+        #: tuple: (frozen configuration, element of each of its paths), built by the first `get_path`
+        self._path_index = None
+        if shared_path is not None:
+            LOGGER.info('attach config published at: %s', shared_path)
+            self.config_path = cfg_path
+            self.conf = self._load()
+        elif cfg_path is not None:
             LOGGER.info('load config at: %s', cfg_path)
             self.config_path = cfg_path
-            self.conf = ConfigLoader.load(cfg_path)
+            if incremental and os.path.isdir(cfg_path):
+                self._incremental_loader = IncrementalLoader(cfg_path)
+            if layers:
+                self.layered = LayeredConfig([cfg_path] + list(layers) + [Config.RUNTIME_LAYER], cache_dir=cache_dir)
+                for path in self.layered.layers[:-1]:
+                    self.layered.bind_layer(path, path)
+            self.conf = self._load()
 
         if '_version' not in self.conf:
-            self.conf['_version'] = 1
+            self.conf = Config._set_version(self.conf, 1)
 
-        Config._instance = self
         self.get = self._instance_get
+        if name is not None:
+            return
+        with Config._instance_lock:
+            # Another instance may have been created while this one was loading
+            if Config._instance is not None:
+                raise Exception('Sorry but it is a singleton class!')
+            Config._instance = self
 
     def _instance_get(self, key, default_value=''):
         return self.conf.get(key, default_value)
 
+    def get_path(self, path: str, default_value=None):
+        """ Returns the element at a dotted path of the configuration (ex: `database.hosts.0.name`).
+        Frozen configurations cannot change in place: their paths are indexed once per loaded configuration,
+        so a lookup costs a single dict access whatever the depth. Other configurations are walked from their root
+        at each call, so nested elements modified in place (ex: `config['foo']['bar'] = 1`) are always seen.
+
+        Args:
+            path (str): Keys separated by dots. List elements are selected with their position.
+            default_value (object, optional): Value returned if the path does not exist. Defaults to None.
+        Returns:
+            object: The element found at the given path, or the default value.
+        """
+        conf = self.conf
+        if isinstance(conf, FrozenDict):
+            return self._current_index(conf).get(path, default_value)
+        return Config._walk(conf, path, default_value)
+
+    def get_many(self, paths: list, default_value=None) -> list:
+        """ Returns the elements at several dotted paths (see `get_path`).
+        The configuration is walked once for all the paths: the common prefixes are only visited once, and lazy,
+        deferred and shared configurations only load, resolve or decode the selected sections.
+
+        Args:
+            paths (list): Keys separated by dots. List elements are selected with their position.
+            default_value (object, optional): Value returned for the paths which do not exist. Defaults to None.
+        Returns:
+            list: The elements found (or the default value), in the order of `paths`.
+        """
+        values = Config._select(self.conf, Config._path_tree(tuple(paths)), default_value)[0]
+        return [values[path] for path in paths]
+
+    def project(self, paths, into=None, default_value=_MISSING):
+        """ Extracts the elements at several dotted paths in a single walk of the configuration.
+
+        With a list of paths, the result is a tree of plain dicts which only contains these paths
+        (ex: `['db.host', 'db.port']` gives `{'db': {'host': ..., 'port': ...}}`, list positions become keys). With a mapping of names to paths,
+        the result is a flat dict of the elements indexed by name. The selected elements themselves are not copied.
+
+        Args:
+            paths (list or dict): Keys separated by dots, or paths indexed by name. List elements are selected with their position.
+            into (callable, optional): Type (ex: dataclass, NamedTuple) called with the top-level keys, or the names,
+                as keyword arguments. Defaults to None (the dict is returned).
+            default_value (object, optional): Value used for the paths which do not exist. Defaults to raising a KeyError.
+        Returns:
+            object: The projected dict, or the object built by `into`.
+        Raises:
+            KeyError: Raised if a path does not exist and no default value is given.
+        """
+        if isinstance(paths, Mapping):
+            values = Config._select(self.conf, Config._path_tree(tuple(paths.values())), default_value)[0]
+            projection = {name: values[path] for name, path in paths.items()}
+        else:
+            projection = Config._select(self.conf, Config._path_tree(tuple(paths)), default_value)[1]
+        return projection if into is None else into(**projection)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _split_path(path: str) -> tuple:
+        return tuple(path.split('.'))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _path_tree(paths: tuple) -> dict:
+        # key -> [path ending at this key or None, tree of the longer paths]
+        tree = {}
+        for path in paths:
+            node = tree
+            keys = path.split('.')
+            for depth, key in enumerate(keys):
+                entry = node.setdefault(key, [None, {}])
+                if depth == len(keys) - 1:
+                    entry[0] = path
+                node = entry[1]
+        return tree
+
+    @staticmethod
+    def _select(conf, tree: dict, default_value=_MISSING) -> tuple:
+        """ Walks the configuration along a tree of paths (see `_path_tree`).
+
+        Returns:
+            tuple: (elements indexed by path, projected tree of plain dicts)
+        """
+        values = {}
+
+        def missing(key, entry, projection):
+            if entry[0] is not None:
+                if default_value is _MISSING:
+                    raise KeyError(entry[0])
+                values[entry[0]] = default_value
+                if projection is not None:
+                    projection[key] = default_value
+                projection = None
+            elif projection is not None:
+                projection[key] = {}
+                projection = projection[key]
+            for child_key, child in entry[1].items():
+                missing(child_key, child, projection)
+
+        def select(node, tree, projection):
+            for key, entry in tree.items():
+                if isinstance(node, Mapping) and key in node:
+                    child = node[key]
+                elif isinstance(node, (list, tuple)) and key.isdigit() and int(key) < len(node):
+                    child = node[int(key)]
+                else:
+                    missing(key, entry, projection)
+                    continue
+                if entry[0] is not None:
+                    values[entry[0]] = child
+                    if projection is not None:
+                        projection[key] = child
+                    # Longer paths are still collected, the projection already has the whole element
+                    if entry[1]:
+                        select(child, entry[1], None)
+                else:
+                    sub_projection = None
+                    if projection is not None:
+                        sub_projection = projection[key] = {}
+                    select(child, entry[1], sub_projection)
+
+        projection = {}
+        select(conf, tree, projection)
+        return values, projection
+
+    def _current_index(self, conf: FrozenDict) -> dict:
+        index = self._path_index
+        if index is None or index[0] is not conf:
+            # The configuration was replaced (reload, update) since the index was built
+            index = self._path_index = (conf, Config._build_index(conf))
+        return index[1]
+
+    @staticmethod
+    def _build_index(conf: FrozenDict) -> dict:
+        # Same paths as `_walk`: string keys without dots for the mappings, positions for the tuples
+        index = {}
+        stack = [('', conf)]
+        while stack:
+            prefix, node = stack.pop()
+            if isinstance(node, Mapping):
+                items = [(key, value) for key, value in node.items() if isinstance(key, str) and '.' not in key]
+            elif isinstance(node, tuple):
+                items = [(str(position), value) for position, value in enumerate(node)]
+            else:
+                continue
+            for key, value in items:
+                path = prefix + key
+                index[path] = value
+                stack.append((path + '.', value))
+        return index
+
+    @staticmethod
+    def _walk(conf: dict, path: str, default_value=None):
+        node = conf
+        for key in Config._split_path(path):
+            if isinstance(node, Mapping) and key in node:
+                node = node[key]
+            elif isinstance(node, (list, tuple)) and key.isdigit() and int(key) < len(node):
+                node = node[int(key)]
+            else:
+                return default_value
+        return node
+
+    def reload(self):
+        """ Loads the configuration again from `config_path` (or attaches its last publication) and replaces the current one.
+        The new configuration is fully loaded (and checked against the schema) before being swapped in,
+        so readers get either the old or the new one. Its `_version` is the current one plus 1. Change callbacks are then called.
+
+        Raises:
+            ValueError: Raised if the Config object was not created from a file/folder.
+            SchemaError: Raised if the new configuration does not match the schema. The current one is kept.
+        """
+        if self.config_path is None and self.shared_path is None:
+            raise ValueError('Config was not loaded from a file or folder, it cannot be reloaded.')
+        with self._reload_lock:
+            LOGGER.info('reload config at: %s', self.shared_path or self.config_path)
+            conf = self._load()
+            self.conf = Config._set_version(conf, self.conf.get('_version', 0) + 1)
+        for callback in list(self._callbacks):
+            callback(self)
+
+    @property
+    def reparsed_count(self) -> int:
+        """ Number of files parsed by the last load or reload of an incremental configuration (see `IncrementalLoader`),
+        None if the configuration is not incremental. """
+        if self._incremental_loader is None:
+            return None
+        return self._incremental_loader.reparsed_count
+
+    def set_override(self, path, value):
+        """ Overrides the value at a path in the `runtime` layer, over the values of the files, and publishes the new configuration.
+        As for `reload`, the new configuration is swapped in with its `_version` plus 1, then change callbacks are called.
+        Overrides are kept across reloads.
+
+        Args:
+            path (str or tuple): Keys separated by dots, or tuple of keys.
+            value (object): New value.
+        Raises:
+            ValueError: Raised if the Config object has no layers, or if the path goes through a list.
+            SchemaError: Raised if the new configuration does not match the schema. The override is discarded.
+        """
+        self._update_runtime_layer(self._check_layered().set, path, value)
+
+    def unset_override(self, path):
+        """ Removes the override of the value at a path, if any, and publishes the new configuration (see `set_override`).
+
+        Args:
+            path (str or tuple): Keys separated by dots, or tuple of keys.
+        Raises:
+            ValueError: Raised if the Config object has no layers.
+        """
+        self._update_runtime_layer(self._check_layered().unset, path)
+
+    def _check_layered(self) -> LayeredConfig:
+        if self.layered is None:
+            raise ValueError('Config was not created with layers, it cannot be overridden.')
+        return self.layered
+
+    def _update_runtime_layer(self, update, *args):
+        with self._reload_lock:
+            # The layers are copied on write: the previous content is restored if the schema check fails
+            previous = self.layered.layer(Config.RUNTIME_LAYER)
+            if not update(*args, layer=Config.RUNTIME_LAYER):
+                return
+            conf = FrozenDict(self.layered.conf) if self.frozen else EasyDict(self.layered.conf)
+            if self.schema is not None:
+                try:
+                    self.schema.check(conf)
+                except Exception:
+                    self.layered.set_layer(Config.RUNTIME_LAYER, previous)
+                    raise
+            self.conf = Config._set_version(conf, self.conf.get('_version', 0) + 1)
+        for callback in list(self._callbacks):
+            callback(self)
+
+    def _load(self) -> EasyDict:
+        with instrumentation.profiling(self.shared_path or self.config_path, force=self.profile) as profile:
+            if self.shared_path is not None:
+                conf = SharedConfig(self.shared_path, wrap=freeze if self.frozen else EasyDict)
+            elif self._incremental_loader is not None:
+                conf = self._incremental_loader.load()
+                with instrumentation.phase('conversion'):
+                    conf = FrozenDict(conf) if self.frozen else EasyDict(conf)
+            elif self.layered is not None:
+                self.layered.reload()
+                with instrumentation.phase('conversion'):
+                    conf = FrozenDict(self.layered.conf) if self.frozen else EasyDict(self.layered.conf)
+            elif self.lazy and os.path.isdir(self.config_path):
+                conf = LazyConfig(self.config_path, wrap=freeze if self.frozen else EasyDict)
+            else:
+                conf = ConfigLoader.load(self.config_path, cache_dir=self.cache_dir, frozen=self.frozen, deferred=self.deferred)
+            if self.schema is not None:
+                # Loads every file of a lazy configuration
+                with instrumentation.phase('validation'):
+                    self.schema.check(conf)
+        if profile is not None:
+            self.last_profile = profile
+        return conf
+
+    @staticmethod
+    def _set_version(conf: dict, version: int) -> dict:
+        # A frozen configuration cannot be modified: a copy with the new version is returned
+        if isinstance(conf, FrozenDict):
+            return conf.updated(_version=version)
+        conf['_version'] = version
+        return conf
+
+    def publish(self, shared_path: str):
+        """ Publishes the configuration so that other processes (ex: server workers) can attach it with
+        `Config(shared_path=...)` instead of loading it: they share its memory pages and only decode the sections they use.
+
+        Args:
+            shared_path (str): Path to the published file, ideally on a memory file system (ex: /dev/shm).
+        """
+        publish(self.conf, shared_path)
+
+    def add_change_callback(self, callback):
+        """ Registers a function called with the Config object each time the configuration is reloaded. """
+        self._callbacks.append(callback)
+
+    def remove_change_callback(self, callback):
+        """ Unregisters a function added with `add_change_callback`. """
+        self._callbacks.remove(callback)
+
+    def watch(self, interval: float = 1.0, use_polling: bool = False):
+        """ Starts the watch mode: the configuration is reloaded in background each time its files change.
+        File system notifications are used if the `watchdog` package is installed, files are polled otherwise.
+        A reload which fails (ex: file being edited) is logged and the current configuration is kept.
+        Attached configurations (`shared_path`) are attached again each time they are published.
+
+        Args:
+            interval (float, optional): Polling period (or notifications grouping delay) in seconds. Defaults to 1.0.
+            use_polling (bool, optional): Poll the files even if notifications are available. Defaults to False.
+        """
+        if self.config_path is None and self.shared_path is None:
+            raise ValueError('Config was not loaded from a file or folder, it cannot be watched.')
+        if self._watcher is not None:
+            return
+        self._watcher = ConfigWatcher(self.shared_path or self.config_path, self.reload, interval=interval, use_polling=use_polling)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """ Stops the watch mode. """
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
     def _flatten(self, keys, values):
         """
         Flattens the config object as a list of string representation.
@@ -94,33 +572,87 @@ class Config():
             list: A list of Key-value dicts that matches the config file hierarchy.
 
         """
-        flatten_list = []
-        if isinstance(values, dict):
-            for key, value in values.items():
-                if key.startswith('_'):
+        return list(Config._iter_flatten(values, keys))
+
+    @staticmethod
+    def _iter_flatten(values, keys: list = None, sep: str = '-', prefix: str = None):
+        children = Config._children(values)
+        if children is None:
+            yield sep.join(keys or []), values
+            return
+        # Depth-first walk with a stack of (iterator, path of the container) pairs: no intermediate list is built
+        stack = [(children, sep.join(keys) + sep if keys else '')]
+        push = stack.append
+        while stack:
+            children, base = stack[-1]
+            for key, value in children:
+                if not isinstance(key, str):
+                    # List positions (or non string keys)
+                    key = str(key)
+                elif key.startswith('_'):
+                    # Private keys (ex: _version) are not part of the flattened configuration
                     continue
-                v = self._flatten(keys + [key], value)
-                flatten_list += v
-        elif isinstance(values, list):
-            for key, value in enumerate(values):
-                v = self._flatten(keys + [str(key)], value)
-                flatten_list += v
-        else:
-            v = [('-'.join(keys), values)]
-            flatten_list += v
-        return flatten_list
+                path = base + key
+                if prefix is not None and not (path.startswith(prefix) or prefix.startswith(path)):
+                    continue
+                # Cheap checks first: isinstance() against the Mapping ABC is slow for scalars
+                if isinstance(value, (dict, list, tuple)) or not isinstance(value, (str, int, float)) and isinstance(value, Mapping):
+                    push((Config._children(value), path + sep))
+                    break
+                if prefix is None or path.startswith(prefix):
+                    yield path, value
+            else:
+                stack.pop()
+
+    def iter_flatten(self, key: str = None, prefix: str = None, sep: str = '-'):
+        """
+        Generator which yields every (flattened key, value) pair of the configuration, like `flatten` but without building the whole dict.
 
-    def flatten(self, key: str = None):
+        Args:
+            key (str, optional): Only flatten this top-level element. Defaults to None (whole configuration).
+            prefix (str, optional): Only yield the flattened keys which start with this prefix. Sub-elements which cannot match are not visited.
+            sep (str, optional): Separator of the keys. Defaults to '-'.
+        Yields:
+            tuple: (flattened key, value) pairs, in the configuration order.
+        """
+        values = self.conf if key is None else self.conf[key]
+        return Config._iter_flatten(values, sep=sep, prefix=prefix)
+
+    def flatten(self, key: str = None, prefix: str = None, sep: str = '-'):
         """
         Function which returns the Config object as a Python dict. Every keys are flattened into a single string (ex: key1-subkey1: value).
+        Results of frozen configurations are cached until the configuration is reloaded: other configurations
+        can be modified in place (ex: `config['foo']['bar'] = 1`), they are flattened at each call.
 
+        Args:
+            key (str, optional): Only flatten this top-level element. Defaults to None (whole configuration).
+            prefix (str, optional): Only keep the flattened keys which start with this prefix.
+            sep (str, optional): Separator of the keys. Defaults to '-'.
         Returns:
             dict: Key-value dict which matches the config file hierarchy.
 
         """
-        if key is not None:
-            return dict(self._flatten([], self.conf[key]))
-        return dict(self._flatten([], self.conf))
+        conf = self.conf
+        if not isinstance(conf, FrozenDict):
+            return dict(self.iter_flatten(key, prefix=prefix, sep=sep))
+        cache = self._flatten_cache
+        if cache is None or cache[0] is not conf:
+            cache = self._flatten_cache = (conf, {})
+        cache_key = (key, prefix, sep)
+        if cache_key not in cache[1]:
+            cache[1][cache_key] = dict(self.iter_flatten(key, prefix=prefix, sep=sep))
+        # Copy: the cached dict must not be modified by the caller
+        return dict(cache[1][cache_key])
+
+    @staticmethod
+    def _children(values):
+        if isinstance(values, dict):
+            return iter(dict.items(values))
+        if isinstance(values, Mapping):
+            return iter(values.items())
+        if isinstance(values, (list, tuple)):
+            return enumerate(values)
+        return None
 
     def __str__(self):
         """
@@ -153,5 +685,26 @@ class Config():
         return self.conf[key]
 
     def __setitem__(self, key: str, value: object):
-        """ Updates an element that is in the Config. """
-        self.conf[key] = value
+        """ Updates an element that is in the Config.
+        The update is copy-on-write: a shallow copy of the configuration is updated then swapped in, so readers
+        holding the current one never see it change. Lazy, deferred and shared configurations are updated in place.
+        """
+        with self._reload_lock:
+            conf = Config._copy(self.conf)
+            conf[key] = value
+            self.conf = conf
+            self._flatten_cache = None
+
+    @staticmethod
+    def _copy(conf: dict) -> dict:
+        # Shallow copy for copy-on-write updates. Frozen configurations are copied by `updated()`,
+        # mappings with their own state (lazy, deferred, shared) synchronize their updates and are returned as is.
+        if isinstance(conf, EasyDict):
+            # Not EasyDict(conf): it would convert the values again
+            copy = EasyDict.__new__(EasyDict)
+            copy.__dict__.update(conf.__dict__)
+            dict.update(copy, conf)
+            return copy
+        if type(conf) is dict:
+            return dict(conf)
+        return conf
@@ -1,131 +1,388 @@
-import glob
 import os
 import yaml
 import logging
-import re
 import errno
-import tempfile
+import functools
 import io
-from deepdiff import DeepDiff  # For Deep Difference of 2 objects
+import time
 from easydict import EasyDict
+from . import discovery, instrumentation, interpolation
+from .cache import ConfigCache
+from .deferred import DeferredDict
+from .frozen import freeze
 LOGGER = logging.getLogger(__name__)
 
 
 class ConfigLoader():
     """Utility class that contains the functions to search yaml files and create the configuration object ."""
-    #: re.Pattern[]: Regex which matches the environment variables format in configuration file (ex. ${VAR_ENV})
-    env_path_matcher = re.compile(r'\$\{([^}^{]+)\}')
+    #: re.Pattern[]: Regex which matches the values to interpolate in configuration file (ex. ${VAR_ENV}/data)
+    env_path_matcher = interpolation.INTERPOLATION_PATTERN
 
     @staticmethod
-    def load(file_path: str) -> EasyDict:
+    def load(file_path: str, cache_dir: str = None, frozen: bool = False, deferred: bool = False) -> EasyDict:
         """ Launch the process of configuration file(s) loading.
         Depending on whether it is a path to a file or a folder, 2 different actions are launched.
 
         Args:
             file_path (str): Path to configuration file/folder.
+            cache_dir (str, optional): Folder of the compiled cache (see `load_cached`). Defaults to None (no cache).
+            frozen (bool, optional): If True, returns a read-only `FrozenDict` instead of an `EasyDict`. Defaults to False.
+            deferred (bool, optional): If True, returns a `DeferredDict` whose references are resolved on first access. Defaults to False.
 
         Returns:
             EasyDict: The python dict which contains the whole configuration.
+
+        Raises:
+            ValueError: Raised if both `frozen` and `deferred` are set.
         """
-        if os.path.isfile(file_path):
-            return EasyDict(ConfigLoader.load_from_file(file_path))
-        else:
-            return EasyDict(ConfigLoader.load_from_folder(file_path))
+        if frozen and deferred:
+            raise ValueError('frozen and deferred configurations cannot be combined.')
+        resolve_env = not deferred
+        with instrumentation.profiling(file_path):
+            if cache_dir is not None:
+                conf = ConfigLoader.load_cached(file_path, cache_dir, resolve_env=resolve_env)
+            elif os.path.isfile(file_path):
+                conf = ConfigLoader.load_from_file(file_path, resolve_env=resolve_env)
+            else:
+                conf = ConfigLoader.load_from_folder(file_path, resolve_env=resolve_env)
+            with instrumentation.phase('conversion'):
+                return ConfigLoader._wrap(conf, frozen=frozen, deferred=deferred)
+
+    @staticmethod
+    async def aload(file_path: str, cache_dir: str = None, frozen: bool = False, deferred: bool = False,
+                    timeout: float = None, executor=None) -> EasyDict:
+        """ Coroutine version of `load`: files are read, parsed and converted in an executor, the event loop is never blocked.
+        The result is the same as `load`. If the coroutine is cancelled (or times out), the reads and parsing
+        already submitted to the executor finish in background and their result is dropped.
+
+        Args:
+            file_path (str): Path to configuration file/folder.
+            cache_dir (str, optional): Folder of the compiled cache (see `load_cached`). Defaults to None (no cache).
+            frozen (bool, optional): If True, returns a read-only `FrozenDict` instead of an `EasyDict`. Defaults to False.
+            deferred (bool, optional): If True, returns a `DeferredDict` whose references are resolved on first access. Defaults to False.
+            timeout (float, optional): Maximum duration of the loading in seconds. Defaults to None (no limit).
+            executor (concurrent.futures.Executor, optional): Executor used to read and parse the files. A process pool
+                can be given to parse in other processes. Defaults to the default executor of the event loop.
+        Returns:
+            EasyDict: The python dict which contains the whole configuration.
+        Raises:
+            asyncio.TimeoutError: Raised if the loading takes more than `timeout` seconds.
+        """
+        import asyncio
+        if frozen and deferred:
+            raise ValueError('frozen and deferred configurations cannot be combined.')
+        loop = _running_loop()
+        if cache_dir is not None:
+            load = functools.partial(ConfigLoader.load, file_path, cache_dir=cache_dir, frozen=frozen, deferred=deferred)
+            return await asyncio.wait_for(loop.run_in_executor(executor, load), timeout)
+
+        async def load():
+            is_file = await loop.run_in_executor(executor, os.path.isfile, file_path)
+            if is_file:
+                conf = await ConfigLoader._aload_files([file_path], not deferred, executor)
+            else:
+                conf = await ConfigLoader.aload_from_folder(file_path, resolve_env=not deferred, executor=executor)
+            # The conversion copies the whole tree: it does not run in the event loop either
+            wrap = functools.partial(ConfigLoader._wrap, conf, frozen=frozen, deferred=deferred)
+            return await loop.run_in_executor(None, wrap)
+
+        return await asyncio.wait_for(load(), timeout)
+
+    @staticmethod
+    async def aload_from_folder(folder_path: str, resolve_env: bool = True, timeout: float = None, executor=None) -> dict:
+        """ Coroutine version of `load_from_folder` (concatenated files). Files are discovered in an executor, read
+        concurrently, then parsed as a single document in the executor: anchors can be shared across files.
+
+        Args:
+            folder_path (str): Absolute path to config folder.
+            resolve_env (bool): If False, environment variables are kept as placeholders (see `interpolation.resolve`). Default value is True.
+            timeout (float, optional): Maximum duration of the loading in seconds. Defaults to None (no limit).
+            executor (concurrent.futures.Executor, optional): Executor used to read and parse the files.
+                Defaults to the default executor of the event loop.
+        Returns:
+            dict: Python dict which contains the concatenated configs.
+        Raises:
+            asyncio.TimeoutError: Raised if the loading takes more than `timeout` seconds.
+        """
+        import asyncio
+
+        async def load():
+            loop = _running_loop()
+            yaml_files = await loop.run_in_executor(executor, ConfigLoader.find_yaml_files, folder_path)
+            return await ConfigLoader._aload_files(ConfigLoader.sort_by_basename(yaml_files), resolve_env, executor)
+
+        return await asyncio.wait_for(load(), timeout)
 
     @staticmethod
-    def load_from_file(file_path: str) -> dict:
+    async def _aload_files(yaml_files: list, resolve_env: bool, executor) -> dict:
+        import asyncio
+        loop = _running_loop()
+        contents = await asyncio.gather(*[loop.run_in_executor(executor, _read_bytes, f) for f in yaml_files])
+        LOGGER.info("Files loading and concatenation.")
+        # Parsed without substitution so that a process pool can be used, resolved in this process
+        conf = await loop.run_in_executor(executor, _parse_yaml_bytes, b''.join(contents))
+        if resolve_env:
+            conf = await loop.run_in_executor(None, interpolation.resolve, conf)
+        return conf
+
+    @staticmethod
+    def _wrap(conf: dict, frozen: bool = False, deferred: bool = False) -> EasyDict:
+        if deferred:
+            return DeferredDict(conf or {})
+        if frozen:
+            return freeze(conf)
+        return EasyDict(conf)
+
+    @staticmethod
+    def load_from_file(file_path: str, resolve_env: bool = True) -> dict:
         """Creates a Config object from a YAML file.
 
             Args:
                 file_path (str): Absolute path to file.
+                resolve_env (bool): If False, environment variables are kept as placeholders (see `interpolation.resolve`). Default value is True.
             Returns:
                 dict: Python dict which contains the configuration.
         """
-        return ConfigLoader.read_yaml_file(file_path)
+        return ConfigLoader.read_yaml_file(file_path, resolve_env=resolve_env)
 
     @staticmethod
-    def load_from_folder(folder_path: str, concatenate: bool = True) -> dict:
+    def load_from_folder(folder_path: str, concatenate: bool = True, cache_dir: str = None, resolve_env: bool = True,
+                         include: list = None, exclude: list = None, max_depth: int = None) -> dict:
         """Creates a Config object from a folder. The folder and its subfolder are searched recursively to get the YAML files it contains.
         These files are then read and concatenated.
 
         Args:
             folder_path (str): Absolute path to config folder.
             concatenate (bool): If True, files are concatenated into a single file before it is parsed. Default value is True.
+            cache_dir (str, optional): Folder of the compiled cache (see `load_cached`). Defaults to None (no cache).
+            resolve_env (bool): If False, environment variables are kept as placeholders (see `interpolation.resolve`). Default value is True.
+            include (list, optional): Only load the files matching one of these patterns (see `find_yaml_files`). Defaults to None.
+            exclude (list, optional): Skip the files and directories matching one of these patterns (see `find_yaml_files`). Defaults to None.
+            max_depth (int, optional): Depth of the deepest visited directories, 0 being `folder_path` itself. Defaults to None (no limit).
         Returns:
             dict: Python dict which contains the concatenated configs.
         """
-        # Recursively read YAML files
-        yaml_files = glob.glob(os.path.join(folder_path, '**/*.yaml'), recursive=True)
-        yaml_files += glob.glob(os.path.join(folder_path, '**/*.yml'), recursive=True)
+        if cache_dir is not None:
+            return ConfigLoader.load_cached(folder_path, cache_dir, concatenate=concatenate, resolve_env=resolve_env,
+                                            include=include, exclude=exclude, max_depth=max_depth)
+
+        yaml_files = ConfigLoader.find_yaml_files(folder_path, include=include, exclude=exclude, max_depth=max_depth)
 
         conf = {}
         if concatenate:
             LOGGER.info("Files loading and concatenation.")
-            yaml_files_sorted_infos = sorted([(os.path.basename(v), i) for i, v in enumerate(yaml_files)])
-            yaml_files_sorted = [yaml_files[idx] for _, idx in yaml_files_sorted_infos]
-            fp = tempfile.TemporaryFile()
-            for yaml_file in yaml_files_sorted:
-                with open(yaml_file, "rb") as yaml_file_stream:
-                    fp.write(yaml_file_stream.read())
-            fp.seek(0)
-            conf = ConfigLoader.read_yaml_stream(fp)
-            fp.close()
+            yaml_files_sorted = ConfigLoader.sort_by_basename(yaml_files)
+            # Files are streamed one after the other to the parser: anchors of a file are visible in the next ones
+            with ChainedReader(yaml_files_sorted) as fp:
+                conf = ConfigLoader.read_yaml_stream(fp, resolve_env=resolve_env)
         else:
             LOGGER.info("Configuration files loading")
             for yaml_file in yaml_files:
-                new_conf = ConfigLoader.read_yaml_file(yaml_file)
+                # References are resolved once the files are merged, so they can target keys of other files
+                new_conf = ConfigLoader.read_yaml_file(yaml_file, resolve_env=False)
                 conf.update(new_conf)
+            if resolve_env:
+                conf = interpolation.resolve(conf)
+        return conf
+
+    @staticmethod
+    def load_from_folder_parallel(folder_path: str, max_workers: int = None, resolve_env: bool = True) -> dict:
+        """Creates a Config object from a folder, parsing its YAML files in parallel.
+        Files are read by a pool of threads and parsed independently by a pool of processes. The results are
+        merged in the same order as the concatenation of `load_from_folder` (files sorted by basename).
+        As files are parsed independently, anchors cannot be shared across files (like `concatenate=False`).
+
+        Args:
+            folder_path (str): Absolute path to config folder.
+            max_workers (int, optional): Number of workers of each pool. Defaults to the number of processors.
+                With 1 worker, files are parsed in the current process.
+            resolve_env (bool): If False, environment variables are kept as placeholders (see `interpolation.resolve`). Default value is True.
+        Returns:
+            dict: Python dict which contains the merged configs.
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError('max_workers must be greater than 0')
+        yaml_files = ConfigLoader.sort_by_basename(ConfigLoader.find_yaml_files(folder_path))
+        LOGGER.info("Parallel loading of %d configuration files with %d workers.", len(yaml_files), max_workers)
+
+        with instrumentation.phase('read'), ThreadPoolExecutor(max_workers=max_workers) as pool:
+            contents = list(pool.map(_read_bytes, yaml_files))
+        for yaml_file, content in zip(yaml_files, contents):
+            instrumentation.record_file(yaml_file, size=len(content))
+
+        with instrumentation.phase('parse'):
+            if max_workers == 1 or len(contents) < 2:
+                parsed = [_parse_yaml_bytes(content) for content in contents]
+            else:
+                # Environment variables are substituted by the current process once the results are merged
+                chunksize = max(1, len(contents) // (max_workers * 4))
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    parsed = list(pool.map(_parse_yaml_bytes, contents, chunksize=chunksize))
+
+        conf = {}
+        for new_conf in parsed:
+            if new_conf:
+                conf.update(new_conf)
+        if resolve_env:
+            conf = interpolation.resolve(conf)
+        return conf
+
+    @staticmethod
+    def load_cached(file_path: str, cache_dir: str, concatenate: bool = True, resolve_env: bool = True,
+                    include: list = None, exclude: list = None, max_depth: int = None) -> dict:
+        """ Loads a configuration file/folder through the compiled on-disk cache.
+        The parsed tree is stored in `cache_dir` along with the path, size, modification time and hash of
+        each source file, and is reused as long as none of these files changed.
+        Environment variables are not stored in the cache: they are substituted each time the tree is loaded.
+
+        Args:
+            file_path (str): Path to configuration file/folder.
+            cache_dir (str): Path to the folder where the cache entries are stored.
+            concatenate (bool): Used for folders only, see `load_from_folder`. Default value is True.
+            resolve_env (bool): If False, environment variables are kept as placeholders (see `interpolation.resolve`). Default value is True.
+            include (list, optional): Used for folders only, see `load_from_folder`. Defaults to None.
+            exclude (list, optional): Used for folders only, see `load_from_folder`. Defaults to None.
+            max_depth (int, optional): Used for folders only, see `load_from_folder`. Defaults to None.
+        Returns:
+            dict: Python dict which contains the configuration.
+        """
+        file_path = os.path.abspath(file_path)
+        search = dict(include=include, exclude=exclude, max_depth=max_depth)
+        cache = ConfigCache(cache_dir)
+        if os.path.isfile(file_path):
+            sources = [file_path]
+        else:
+            sources = ConfigLoader.find_yaml_files(file_path, **search)
+            if concatenate:
+                sources = ConfigLoader.sort_by_basename(sources)
+        key = '{path}|concatenate={concatenate}'.format(path=file_path, concatenate=concatenate)
+        if include or exclude or max_depth is not None:
+            key += '|include={include}|exclude={exclude}|max_depth={max_depth}'.format(**search)
+
+        conf = cache.get(key, sources)
+        if conf is None:
+            # The stored stamps are those of the bytes which are parsed, even if a file is modified meanwhile
+            stamps, contents = [], []
+            for source in sources:
+                stamp, content = ConfigCache.read_source(source)
+                stamps.append(stamp)
+                contents.append(content)
+            if concatenate:
+                # Same as the concatenation of `load_from_folder`: anchors of a file are visible in the next ones
+                conf = _parse_yaml_bytes(b''.join(contents)) or {}
+            else:
+                conf = {}
+                for content in contents:
+                    conf.update(_parse_yaml_bytes(content) or {})
+            cache.put(key, sources, conf, stamps=stamps)
+
+        if resolve_env:
+            conf = interpolation.resolve(conf)
         return conf
 
     @staticmethod
-    def read_yaml_file(filename: str) -> dict:
+    def find_yaml_files(folder_path: str, include: list = None, exclude: list = None, max_depth: int = None) -> list:
+        """ Recursively searches a folder for YAML files (.yaml and .yml), in a single walk (see `discovery.find_files`).
+        Listings of the directories are reused as long as their modification time is unchanged.
+
+        Args:
+            folder_path (str): Path to config folder.
+            include (list, optional): Only keep the files whose relative path matches one of these patterns (ex: `part1/*`). Defaults to None.
+            exclude (list, optional): Skip the files and directories whose relative path matches one of these patterns. Defaults to None.
+            max_depth (int, optional): Depth of the deepest visited directories, 0 being `folder_path` itself. Defaults to None (no limit).
+        Returns:
+            list: Paths to the YAML files found.
+        """
+        with instrumentation.phase('discovery'):
+            found = discovery.find_files(folder_path, include=include, exclude=exclude, max_depth=max_depth)
+        # Same order as the former search of each extension: .yaml files first, then .yml files
+        yaml_files = [path for path in found if path.endswith('.yaml')]
+        yaml_files += [path for path in found if not path.endswith('.yaml')]
+        return yaml_files
+
+    @staticmethod
+    def sort_by_basename(yaml_files: list) -> list:
+        """ Sorts files by their basename, which is the order in which they are concatenated. """
+        # Stable sort: files with the same basename keep their search order
+        return sorted(yaml_files, key=os.path.basename)
+
+    @staticmethod
+    def read_yaml_file(filename: str, resolve_env: bool = True) -> dict:
         """ Create a Config object from a file.
 
         Args:
             filename (str): Absolute path to file.
+            resolve_env (bool): If False, environment variables are kept as placeholders. Default value is True.
         Returns:
             dict: Python dict which contains the key/value from the YAML file.
         """
         with open(filename, 'r') as stream:
             LOGGER.info('Chargement du fichier de configuration %s', filename)
-            return ConfigLoader.read_yaml_stream(stream)
+            if instrumentation.current() is None:
+                return ConfigLoader.read_yaml_stream(stream, resolve_env=resolve_env)
+            # The file is read while it is parsed: its read time is part of its parse time
+            start = time.perf_counter()
+            conf = ConfigLoader.read_yaml_stream(stream, resolve_env=resolve_env)
+            instrumentation.record_file(filename, size=os.fstat(stream.fileno()).st_size, parse=time.perf_counter() - start)
+            return conf
 
     @staticmethod
-    def read_yaml_stream(filestream: io.BufferedIOBase) -> dict:
+    def read_yaml_stream(filestream: io.BufferedIOBase, resolve_env: bool = True, loader_class: type = None) -> dict:
         """ Creates a Config object from a stream.
 
         Args:
             filestream (io.BufferedIOBase): stream
+            resolve_env (bool): If False, environment variables are kept as placeholders. Default value is True.
+            loader_class (type, optional): YAML loader to use. Defaults to `YamlLoader` (libyaml based when available).
         Returns:
             dict: Python dict which contains the key/value from the YAML file.
         """
-        # Constructor which finds the "custom tags" (!join) in YAML file
-        # It enables the program to start a function which will concatenate 2 strings (a bit like os.path.join(...))
-        yaml.add_constructor('!join', ConfigLoader.join, yaml.SafeLoader)
-        # Resolver which tries to match the regex for environment variables
-        yaml.add_implicit_resolver('!env_var', ConfigLoader.env_path_matcher, None, yaml.SafeLoader)
-        # Constructeur binded to the previous resolver for environment varaibles
-        yaml.add_constructor('!env_var', ConfigLoader.env_path_constructor, yaml.SafeLoader)
+        if loader_class is None:
+            loader_class = YamlLoader
+        loader = loader_class(filestream, resolve_env=resolve_env)
         try:
-            return yaml.safe_load(filestream)
+            with instrumentation.phase('parse'):
+                data = loader.get_single_data()
+            if loader.deferred:
+                # Values which reference other keys are resolved once the whole document is read
+                return interpolation.resolve(data, interpolator=loader.interpolator)
+            if loader.interpolator is not None:
+                loader.interpolator.warn_missing()
+            return data
         except yaml.YAMLError as exc:
-            LOGGER.error('Configuration file contains format error.')
+            if ConfigLoader.is_undefined_alias(exc):
+                # Expected when the files of a folder are parsed independently, callers fall back to a concatenated load
+                LOGGER.debug('Configuration file uses an anchor defined in another file: %s', exc)
+            else:
+                LOGGER.error('Configuration file contains format error.')
             raise exc
+        finally:
+            loader.dispose()
 
     @staticmethod
-    def env_path_constructor(loader: yaml.loader.SafeLoader, node: yaml.ScalarNode) -> str:
-        """ Extracts the value of a node that matches the regex to read the associated environment variable then replace it with its value. """
-        value = node.value
-        match = ConfigLoader.env_path_matcher.match(value)
-        env_var = match.group(1)
-
-        try:
-            env_var_value = os.environ[env_var]
-        except KeyError:
-            LOGGER.warning("No value for the following environment variable : [%s]. Initializing it as empty string.", str(env_var))
-            return ''
+    def is_undefined_alias(exc: Exception) -> bool:
+        """ Returns True if a parsing error comes from an alias whose anchor is not defined in the parsed file
+        (ex: an anchor defined in another file of the folder, only visible when the files are concatenated).
+        """
+        return isinstance(exc, yaml.composer.ComposerError) and 'undefined alias' in str(exc)
 
-        return env_var_value + value[match.end():]
+    @staticmethod
+    def env_path_constructor(loader: 'PyYamlLoader', node: yaml.ScalarNode) -> str:
+        """ Extracts the value of a node that matches the regex and replaces its references (see `interpolation`).
+        References to other keys of the configuration are kept as placeholders until the whole document is read. """
+        value = node.value
+        if not loader.resolve_env:
+            return interpolation.EnvReference(value)
+        if interpolation.has_config_references(value):
+            loader.deferred = True
+            return interpolation.EnvReference(value)
+        if not instrumentation.enabled:
+            return loader.interpolator.interpolate(value)
+        with instrumentation.phase('interpolation'):
+            return loader.interpolator.interpolate(value)
 
     @staticmethod
     def check_template_match(config_path: str, template_path: str = None) -> bool:
@@ -149,6 +406,8 @@ class ConfigLoader():
             raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), template_path)
 
         template_dict = ConfigLoader.read_yaml_file(template_path)
+        # Imported on use: deepdiff and its dependencies are slow to import
+        from deepdiff import DeepDiff
         diff = DeepDiff(config_dict, template_dict, ignore_order=True)
         if('dictionary_item_removed' not in diff.keys()):
             match = True
@@ -159,7 +418,7 @@ class ConfigLoader():
 
     # define custom tag handler
     @staticmethod
-    def join(loader: yaml.loader.SafeLoader, node: yaml.ScalarNode) -> str:
+    def join(loader: 'PyYamlLoader', node: yaml.ScalarNode) -> str:
         """ Custom tags handler. Function launched when reading a configuration file and a \"custom tag\" !path is found.
         It allows to concatenate the string parameters of the field. (ex: data_dir: !join [\*project_dir, /data])
 
@@ -170,4 +429,109 @@ class ConfigLoader():
             str: Concatenated value of both strings.
         """ 
         seq = loader.construct_sequence(node)
+        if any(interpolation.is_placeholder(i) for i in seq):
+            return interpolation.JoinReference(seq)
         return ''.join([str(i) for i in seq])
+
+
+class ChainedReader(io.RawIOBase):
+    """Read-only binary stream over several files, read one after the other as if they were a single file.
+    Only one file is opened at a time and nothing is copied: reads go straight to the underlying files.
+    """
+
+    def __init__(self, file_paths: list):
+        """Constructor of the ChainedReader object.
+
+        Args:
+            file_paths (list): Paths of the files to read, in order.
+        """
+        super().__init__()
+        #: str: name displayed in parser error messages
+        self.name = '<{} concatenated files>'.format(len(file_paths))
+        self._file_paths = iter(file_paths)
+        self._current = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while True:
+            if self._current is None:
+                file_path = next(self._file_paths, None)
+                if file_path is None:
+                    return 0
+                self._current = open(file_path, 'rb', buffering=0)
+            if not instrumentation.enabled or instrumentation.current() is None:
+                size = self._current.readinto(buffer)
+            else:
+                with instrumentation.phase('read'):
+                    start = time.perf_counter()
+                    size = self._current.readinto(buffer)
+                    instrumentation.record_file(self._current.name, size=size, read=time.perf_counter() - start)
+            if size:
+                return size
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
+
+
+def _running_loop():
+    # Coroutines only: asyncio.get_running_loop does not exist before Python 3.7
+    import asyncio
+    return getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)()
+
+
+def _read_bytes(file_path: str) -> bytes:
+    with open(file_path, 'rb') as stream:
+        return stream.read()
+
+
+def _parse_yaml_bytes(content: bytes) -> dict:
+    # Module level function so it can be sent to the workers of a process pool
+    return ConfigLoader.read_yaml_stream(io.BytesIO(content), resolve_env=False)
+
+
+class _LoaderOptionsMixin():
+    """Attributes shared by the YAML loaders of the configuration files, set once the base loader is initialized."""
+
+    def __init__(self, stream, resolve_env: bool = True):
+        super().__init__(stream)
+        #: bool: read by the constructors to know if environment variables have to be substituted now
+        self.resolve_env = resolve_env
+        #: interpolation.Interpolator: resolves the references, with a single snapshot of the environment
+        self.interpolator = interpolation.Interpolator() if resolve_env else None
+        #: bool: True if some values could only be resolved once the whole document is read
+        self.deferred = False
+
+
+class PyYamlLoader(_LoaderOptionsMixin, yaml.SafeLoader):
+    """Pure-Python safe YAML loader which handles the custom tags of the configuration files
+    (`!join` and environment variables). Tags are registered on this class only, `yaml.SafeLoader` is left untouched.
+    """
+
+
+if yaml.__with_libyaml__:
+    class CYamlLoader(_LoaderOptionsMixin, yaml.CSafeLoader):
+        """Same as `PyYamlLoader` but based on the libyaml C parser, which is several times faster."""
+
+    #: type: Loader used by default, the fastest available
+    YamlLoader = CYamlLoader
+else:
+    CYamlLoader = None
+    YamlLoader = PyYamlLoader
+
+for _loader_class in (PyYamlLoader, CYamlLoader):
+    if _loader_class is None:
+        continue
+    # Constructor which finds the "custom tags" (!join) in YAML file
+    # It enables the program to start a function which will concatenate 2 strings (a bit like os.path.join(...))
+    _loader_class.add_constructor('!join', ConfigLoader.join)
+    # Resolver which tries to match the regex for environment variables
+    _loader_class.add_implicit_resolver('!env_var', ConfigLoader.env_path_matcher, None)
+    # Constructeur binded to the previous resolver for environment varaibles
+    _loader_class.add_constructor('!env_var', ConfigLoader.env_path_constructor)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from collections.abc import MutableMapping
+from .interpolation import Interpolator, PLACEHOLDER_TYPES
+
+
+class DeferredDict(MutableMapping):
+    """Configuration whose references (`${VAR}`, `${config:a.b}`, `!join`) are resolved on first access.
+
+    It wraps a tree read with `resolve_env=False` without copying it: the parsed tree is left untouched,
+    so it can be cached or shared between processes which have different environments. Resolved values and
+    wrapped sub-elements are memoized, each reference is resolved at most once per configuration.
+    The environment is read once, when the configuration is wrapped: a reload is needed to follow its changes.
+    """
+    __slots__ = ('_data', '_resolved', '_interpolator')
+
+    def __init__(self, data: dict = None, interpolator: Interpolator = None):
+        """Constructor of the DeferredDict object.
+
+        Args:
+            data (dict, optional): Configuration tree read with `resolve_env=False`. Defaults to an empty dict.
+            interpolator (Interpolator, optional): Interpolator shared by the sub-elements. Defaults to a new one
+                whose `${config:...}` references are looked up in `data`.
+        """
+        data = {} if data is None else data
+        object.__setattr__(self, '_data', data)
+        object.__setattr__(self, '_resolved', {})
+        object.__setattr__(self, '_interpolator', Interpolator(root=data) if interpolator is None else interpolator)
+
+    def __getitem__(self, key):
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        value = self._data[key]
+        if isinstance(value, (dict, list) + PLACEHOLDER_TYPES):
+            value = self._resolved[key] = self._wrap(value)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._resolved.pop(key, None)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._resolved.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __getattr__(self, name: str):
+        # Only called when the normal lookup failed: keys are exposed as attributes
+        if name in DeferredDict.__slots__:
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: object):
+        self[name] = value
+
+    def __delattr__(self, name: str):
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self) -> str:
+        return 'DeferredDict(%r)' % (self._data,)
+
+    def __reduce__(self):
+        # Only the raw tree is sent: references are resolved in the environment of the receiving process
+        return (DeferredDict, (self._data,))
+
+    @property
+    def raw(self) -> dict:
+        """ Parsed tree, with its placeholders. """
+        return self._data
+
+    def _wrap(self, value: object) -> object:
+        if isinstance(value, PLACEHOLDER_TYPES):
+            value = value.resolve(self._interpolator)
+            self._interpolator.warn_missing()
+        if isinstance(value, dict):
+            return DeferredDict(value, self._interpolator)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        return value
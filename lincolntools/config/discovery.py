@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import fnmatch
+import logging
+import os
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+#: tuple: Extensions of the configuration files
+YAML_EXTENSIONS = ('.yaml', '.yml')
+#: int: Directories modified less than this number of nanoseconds ago are not cached: file systems store modification
+#: times with a coarse resolution, an entry added right after the listing could leave the time unchanged
+RACY_DELAY_NS = 2 * 10 ** 9
+
+
+class DirectoryListingCache():
+    """Listings of directories, reused as long as the modification time of the directory is unchanged.
+
+    The modification time of a directory changes when an entry is added, removed or renamed in it, so a
+    cached tree is checked with one `stat` per directory instead of listing each of them again.
+    Directories modified in the last seconds (see `RACY_DELAY_NS`) are listed each time.
+    """
+
+    def __init__(self):
+        # directory path -> (modification time, file names, sub-directory names)
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def listing(self, dir_path: str) -> tuple:
+        """ Returns the non hidden entries of a directory.
+
+        Args:
+            dir_path (str): Path to directory.
+        Returns:
+            tuple: (file names, sub-directory names) lists, in the order of the file system.
+        """
+        mtime = os.stat(dir_path).st_mtime_ns
+        cached = self._listings.get(dir_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        files, subdirs = scan_directory(dir_path)
+        if int(time.time() * 10 ** 9) - mtime > RACY_DELAY_NS:
+            with self._lock:
+                self._listings[dir_path] = (mtime, files, subdirs)
+        return files, subdirs
+
+    def clear(self):
+        """ Forgets every listing. """
+        with self._lock:
+            self._listings.clear()
+
+
+#: DirectoryListingCache: listings shared by the searches of the process
+LISTINGS = DirectoryListingCache()
+
+
+def scan_directory(dir_path: str) -> tuple:
+    """ Lists a directory with a single `os.scandir` call. Hidden entries are skipped, like `glob` does.
+
+    Args:
+        dir_path (str): Path to directory.
+    Returns:
+        tuple: (file names, sub-directory names) lists, in the order of the file system.
+    """
+    files = []
+    subdirs = []
+    # Exhausting the iterator closes the directory (the iterator is a context manager only since Python 3.6)
+    for entry in list(os.scandir(dir_path)):
+        if entry.name.startswith('.'):
+            continue
+        # Symbolic links to directories are followed, like `glob` does
+        if entry.is_dir():
+            subdirs.append(entry.name)
+        else:
+            files.append(entry.name)
+    return files, subdirs
+
+
+def find_files(folder_path: str, extensions: tuple = YAML_EXTENSIONS, include: list = None, exclude: list = None,
+               max_depth: int = None, use_cache: bool = True) -> list:
+    """ Recursively searches a folder for files with the given extensions, in a single walk.
+
+    Patterns are matched (`fnmatch`) against the path relative to `folder_path`, with `/` separators
+    (ex: `part1/config.yaml`). Directories matching an exclude pattern are not visited.
+
+    Args:
+        folder_path (str): Path to folder.
+        extensions (tuple, optional): Extensions of the files to find. Defaults to `.yaml` and `.yml`.
+        include (list, optional): Only keep the files matching one of these patterns. Defaults to None (all files).
+        exclude (list, optional): Skip the files and directories matching one of these patterns. Defaults to None.
+        max_depth (int, optional): Depth of the deepest visited directories, 0 being `folder_path` itself. Defaults to None (no limit).
+        use_cache (bool, optional): Reuse the listings of the directories which did not change since the last search. Defaults to True.
+    Returns:
+        list: Paths to the files found, depth-first: files of a directory come before those of its sub-directories.
+    """
+    listing = LISTINGS.listing if use_cache else scan_directory
+    found = []
+    # (directory path, path relative to folder_path, depth)
+    stack = [(folder_path, '', 0)]
+    while stack:
+        dir_path, relative_dir, depth = stack.pop()
+        try:
+            files, subdirs = listing(dir_path)
+        except OSError:
+            LOGGER.warning('Unable to list directory %s', dir_path, exc_info=True)
+            continue
+        for name in files:
+            if not name.endswith(extensions):
+                continue
+            relative_path = relative_dir + name
+            if include and not _matches(relative_path, include):
+                continue
+            if exclude and _matches(relative_path, exclude):
+                continue
+            found.append(os.path.join(dir_path, name))
+        if max_depth is not None and depth >= max_depth:
+            continue
+        # Pushed in reverse order: the first sub-directory is visited first
+        for name in reversed(subdirs):
+            relative_path = relative_dir + name
+            if exclude and _matches(relative_path, exclude):
+                continue
+            stack.append((os.path.join(dir_path, name), relative_path + '/', depth + 1))
+    return found
+
+
+def file_stamp(file_path: str) -> tuple:
+    """ Returns the cheap identity of a file, which changes when the file is modified: its size and modification time.
+
+    Args:
+        file_path (str): Path to file.
+    Returns:
+        tuple: (size, modification time in nanoseconds).
+    """
+    status = os.stat(file_path)
+    return status.st_size, status.st_mtime_ns
+
+
+def file_stamps(files: list, skip_missing: bool = False) -> dict:
+    """ Returns the identity of several files (see `file_stamp`).
+
+    Args:
+        files (list): Paths to files.
+        skip_missing (bool, optional): Leave out the files which cannot be accessed (ex: removed meanwhile) instead of raising. Defaults to False.
+    Returns:
+        dict: (size, modification time) tuples indexed by file path.
+    """
+    stamps = {}
+    for file_path in files:
+        try:
+            stamps[file_path] = file_stamp(file_path)
+        except OSError:
+            if not skip_missing:
+                raise
+    return stamps
+
+
+def _matches(relative_path: str, patterns: list) -> bool:
+    return any(fnmatch.fnmatchcase(relative_path, pattern) for pattern in patterns)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from collections.abc import Mapping
+
+
+class FrozenDict(Mapping):
+    """Read-only mapping with attribute access, used as a compact alternative to `EasyDict`.
+
+    Values are stored once (`EasyDict` stores each of them both as an item and as an attribute), nested
+    dicts are converted to `FrozenDict` and lists to tuples. As it cannot be modified, a `FrozenDict` is
+    hashable and can be shared between threads without locks.
+    """
+    __slots__ = ('_data', '_hash')
+
+    def __init__(self, data=()):
+        """Constructor of the FrozenDict object.
+
+        Args:
+            data (Mapping or iterable, optional): Content of the mapping, values are frozen with `freeze`.
+        """
+        memo = {}
+        object.__setattr__(self, '_data', {key: _freeze(value, memo) for key, value in dict(data).items()})
+        object.__setattr__(self, '_hash', None)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __getattr__(self, name: str):
+        # Only called when the normal lookup failed: keys are exposed as attributes
+        if name in FrozenDict.__slots__:
+            raise AttributeError(name)
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: object):
+        raise TypeError("'FrozenDict' object is read-only")
+
+    def __delattr__(self, name: str):
+        raise TypeError("'FrozenDict' object is read-only")
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(frozenset(self._data.items())))
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FrozenDict):
+            return self._data == other._data
+        if isinstance(other, Mapping):
+            return self._data == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self) -> str:
+        return 'FrozenDict(%r)' % (self._data,)
+
+    def __reduce__(self):
+        return (_from_frozen_data, (self._data,))
+
+    def updated(self, *args, **kwargs) -> 'FrozenDict':
+        """ Returns a copy of the mapping with some keys added or replaced, like `dict.update`. """
+        data = dict(self._data)
+        data.update(*args, **kwargs)
+        return FrozenDict(data)
+
+    def thaw(self) -> dict:
+        """ Returns a mutable copy of the mapping, with plain dicts and lists. """
+        return thaw(self)
+
+
+def freeze(value: object) -> object:
+    """ Converts a configuration tree into its frozen form in a single pass.
+    Dicts become `FrozenDict`, lists become tuples, containers shared through YAML anchors are converted once.
+
+    Args:
+        value (object): Configuration tree (dict, list or scalar).
+    Returns:
+        object: The frozen tree.
+    """
+    return _freeze(value, {})
+
+
+def thaw(value: object) -> object:
+    """ Converts a tree (frozen, `EasyDict` or any mapping) into plain dicts and lists in a single walk.
+    Containers shared through YAML anchors are copied at each occurrence.
+
+    Args:
+        value (object): Configuration tree.
+    Returns:
+        object: The tree made of plain dicts, lists and scalars.
+    """
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in _items(value)}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    if isinstance(value, (str, int, float)) or value is None:
+        return value
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    return value
+
+
+def _freeze(value: object, memo: dict) -> object:
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        frozen = memo.get(id(value))
+        if frozen is not None:
+            return frozen
+        if isinstance(value, dict):
+            frozen = _from_frozen_data({key: _freeze(item, memo) for key, item in dict.items(value)})
+        else:
+            frozen = tuple(_freeze(item, memo) for item in value)
+        memo[id(value)] = frozen
+        return frozen
+    return value
+
+
+def _from_frozen_data(data: dict) -> FrozenDict:
+    # Builds a FrozenDict from already frozen values, without copying them again
+    frozen = FrozenDict.__new__(FrozenDict)
+    object.__setattr__(frozen, '_data', data)
+    object.__setattr__(frozen, '_hash', None)
+    return frozen
+
+
+def _items(node: Mapping):
+    # Not node.items(): an EasyDict key may hide the method (ex: `items`)
+    return dict.items(node) if isinstance(node, dict) else node.items()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import logging
+import yaml
+from . import discovery, interpolation
+from .config_loader import ConfigLoader
+
+LOGGER = logging.getLogger(__name__)
+
+
+class IncrementalLoader():
+    """Loads a configuration folder and, on the next loads, only parses again the files which changed.
+
+    The parse result of each file is kept along with the top-level keys it defines. When files change,
+    only these files are parsed and only the top-level keys they define (before or after the change) are merged again.
+    Files are merged in the same order as the concatenation of `ConfigLoader.load_from_folder`.
+    References (`${VAR}`, `${config:a.b}`) are resolved at each load, after the merge, so they can target keys of other files.
+
+    Files are parsed independently, so anchors cannot be shared across files. When a file uses an anchor
+    defined in another one, the loader falls back to a full load of the concatenated files.
+    """
+
+    def __init__(self, folder_path: str):
+        """Constructor of the IncrementalLoader object.
+
+        Args:
+            folder_path (str): Path to config folder.
+        """
+        #: str: path to the configuration folder
+        self.folder_path = folder_path
+        #: int: number of files parsed by the last load (monitoring)
+        self.reparsed_count = 0
+        #: bool: False once cross-file anchors were found, every load is then a full load
+        self.incremental = True
+        # file path -> ((size, modification time), parsed content)
+        self._files = {}
+        # top-level key -> files which define it
+        self._owners = {}
+        # Merged configuration, with the references kept as placeholders
+        self._conf = {}
+        # top-level keys whose value contains references
+        self._templated = set()
+
+    def load(self) -> dict:
+        """ Loads the configuration, parsing only the files which changed since the last load.
+
+        Returns:
+            dict: Python dict which contains the merged configs. It is a new dict at each call.
+        """
+        yaml_files = ConfigLoader.sort_by_basename(ConfigLoader.find_yaml_files(self.folder_path))
+        stamps = discovery.file_stamps(yaml_files)
+
+        changed = [f for f in yaml_files if f not in self._files or self._files[f][0] != stamps[f]]
+        removed = [f for f in self._files if f not in stamps]
+
+        if not self.incremental:
+            if changed or removed or not self._files:
+                self._full_load(yaml_files, stamps)
+            else:
+                self.reparsed_count = 0
+            return dict(self._conf)
+
+        try:
+            parsed = {f: ConfigLoader.read_yaml_file(f, resolve_env=False) or {} for f in changed}
+        except yaml.composer.ComposerError as exc:
+            if not ConfigLoader.is_undefined_alias(exc):
+                raise
+            LOGGER.warning('Anchors are shared across files of %s, falling back to full loads.', self.folder_path)
+            self.incremental = False
+            self._full_load(yaml_files, stamps)
+            return dict(self._conf)
+
+        affected = set()
+        for yaml_file in removed:
+            affected.update(self._files.pop(yaml_file)[1])
+        for yaml_file, conf in parsed.items():
+            if yaml_file in self._files:
+                affected.update(self._files[yaml_file][1])
+            affected.update(conf)
+            self._files[yaml_file] = (stamps[yaml_file], conf)
+
+        # Merge again the affected keys: the last file (in loading order) defining a key wins
+        rank = {f: i for i, f in enumerate(yaml_files)}
+        for key in affected:
+            owners = sorted((f for f in self._files if key in self._files[f][1]), key=rank.get)
+            self._templated.discard(key)
+            if owners:
+                self._owners[key] = owners
+                self._conf[key] = self._files[owners[-1]][1][key]
+                if _has_placeholders(self._conf[key]):
+                    self._templated.add(key)
+            else:
+                self._owners.pop(key, None)
+                self._conf.pop(key, None)
+
+        self.reparsed_count = len(changed)
+        LOGGER.info('%d/%d configuration files parsed.', self.reparsed_count, len(yaml_files))
+        return self._resolve()
+
+    def owners(self, key: str) -> list:
+        """ Returns the files which define a top-level key, the last one being the one used.
+
+        Args:
+            key (str): Top-level key of the configuration.
+        Returns:
+            list: Paths to the files which define the key.
+        """
+        return list(self._owners.get(key, []))
+
+    def _resolve(self) -> dict:
+        conf = dict(self._conf)
+        if self._templated:
+            # The parsed files keep their placeholders: the values which contain references are copied before being resolved
+            for key in self._templated:
+                conf[key] = _copy(conf[key])
+            interpolation.resolve(conf)
+        return conf
+
+    def _full_load(self, yaml_files: list, stamps: dict):
+        self._conf = ConfigLoader.load_from_folder(self.folder_path) or {}
+        self._files = {f: (stamps[f], {}) for f in yaml_files}
+        self._owners = {}
+        self._templated = set()
+        self.reparsed_count = len(yaml_files)
+        LOGGER.info('%d/%d configuration files parsed.', self.reparsed_count, len(yaml_files))
+
+
+def _has_placeholders(value: object) -> bool:
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if interpolation.is_placeholder(node):
+            return True
+        if isinstance(node, dict):
+            stack.extend(dict.values(node))
+        elif isinstance(node, list):
+            stack.extend(node)
+    return False
+
+
+def _copy(value: object) -> object:
+    # Copies the containers only, the scalars are shared
+    if isinstance(value, dict):
+        return {key: _copy(child) for key, child in dict.items(value)}
+    if isinstance(value, list):
+        return [_copy(child) for child in value]
+    return value
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Instrumentation of the configuration loading: time spent in each phase, size and timings of each file.
+
+A load is profiled when a hook is registered (`add_hook`) or when it is run inside `profiling(..., force=True)`.
+Measure points in hot paths check `enabled` first: they cost a single attribute lookup when nothing is profiled.
+"""
+import logging
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+#: tuple: Phases of a load, in their usual order
+PHASES = ('discovery', 'read', 'parse', 'interpolation', 'conversion', 'validation')
+
+#: int: Number of loads being profiled, in all threads
+enabled = 0
+
+# Functions called with each finished LoadProfile
+_hooks = []
+_enabled_lock = threading.Lock()
+# Profile (and stack of running phases) of the load running in the current thread
+_state = threading.local()
+
+
+class LoadProfile():
+    """Measures of a configuration load.
+
+    Phase timings are exclusive: the time spent in a phase nested in another one (ex: reading the files
+    while they are parsed) is only counted in the nested phase.
+    """
+
+    def __init__(self, path: str):
+        """Constructor of the LoadProfile object.
+
+        Args:
+            path (str): Path to the loaded configuration file/folder.
+        """
+        #: str: path to the loaded configuration file/folder
+        self.path = path
+        #: dict: time spent in each phase, in seconds
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        #: dict: {'bytes': size, 'read': seconds, 'parse': seconds or None} indexed by file path. The parse time
+        #: is only known for files parsed alone: concatenated files are parsed as a single document.
+        self.files = {}
+        #: float: duration of the whole load, in seconds
+        self.total = 0.0
+
+    @property
+    def bytes(self) -> int:
+        """ Number of bytes read. """
+        return sum(stats['bytes'] for stats in self.files.values())
+
+    def add_file(self, file_path: str, size: int = 0, read: float = 0.0, parse: float = None):
+        """ Adds the measures of a file (they are summed with the previous ones of the same file). """
+        stats = self.files.setdefault(file_path, {'bytes': 0, 'read': 0.0, 'parse': None})
+        stats['bytes'] += size
+        stats['read'] += read
+        if parse is not None:
+            stats['parse'] = (stats['parse'] or 0.0) + parse
+
+    def as_dict(self) -> dict:
+        """ Returns the measures as plain Python types (ex: to be sent to a metrics system). """
+        return {'path': self.path, 'total': self.total, 'phases': dict(self.phases),
+                'files': {path: dict(stats) for path, stats in self.files.items()}}
+
+    def format(self) -> str:
+        """ Returns a human readable breakdown of the load. """
+        lines = ['Profile of {path}: {total:.2f} ms, {files} files, {size} bytes'.format(
+            path=self.path, total=self.total * 1000, files=len(self.files), size=self.bytes)]
+        lines.append('{:<15} {:>12} {:>7}'.format('phase', 'time (ms)', 'share'))
+        phases = list(self.phases.items())
+        phases.append(('other', max(0.0, self.total - sum(self.phases.values()))))
+        for name, duration in phases:
+            share = duration / self.total * 100 if self.total else 0.0
+            lines.append('{:<15} {:>12.3f} {:>6.1f}%'.format(name, duration * 1000, share))
+        if self.files:
+            lines.append('')
+            width = max(len(path) for path in self.files)
+            lines.append('{:<{width}} {:>10} {:>10} {:>11}'.format('file', 'bytes', 'read (ms)', 'parse (ms)', width=width))
+            for path, stats in sorted(self.files.items(), key=lambda item: -item[1]['bytes']):
+                parse = '-' if stats['parse'] is None else '{:.3f}'.format(stats['parse'] * 1000)
+                lines.append('{:<{width}} {:>10} {:>10.3f} {:>11}'.format(path, stats['bytes'], stats['read'] * 1000, parse, width=width))
+        return '\n'.join(lines)
+
+    def __repr__(self) -> str:
+        return 'LoadProfile(%r, total=%.6f, phases=%r)' % (self.path, self.total, self.phases)
+
+
+def add_hook(callback):
+    """ Registers a function called with the `LoadProfile` of each load. Exceptions raised by hooks are logged and ignored. """
+    _hooks.append(callback)
+
+
+def remove_hook(callback):
+    """ Unregisters a function added with `add_hook`. """
+    _hooks.remove(callback)
+
+
+def current() -> LoadProfile:
+    """ Returns the profile of the load running in the current thread, None if it is not profiled. """
+    return getattr(_state, 'profile', None)
+
+
+def profiling(path: str, force: bool = False) -> '_Profiling':
+    """ Returns a context manager which profiles the loads run inside it, in the current thread.
+    Nested blocks (ex: `Config` loading through `ConfigLoader.load`) add their measures to the outermost one,
+    whose profile is given to the hooks when it exits.
+
+    Args:
+        path (str): Path to the loaded configuration file/folder.
+        force (bool, optional): Profile even if no hook is registered. Defaults to False.
+    Returns:
+        _Profiling: Context manager whose value is the `LoadProfile`, or None if the load is not profiled.
+    """
+    return _Profiling(path, force)
+
+
+def phase(name: str) -> '_Phase':
+    """ Returns a context manager which adds the time spent inside it to a phase of the current profile, if any. """
+    return _Phase(name)
+
+
+class _Profiling():
+
+    def __init__(self, path: str, force: bool):
+        self._path = path
+        self._force = force
+        self._profile = None
+        self._start = None
+
+    def __enter__(self) -> LoadProfile:
+        profile = current()
+        if profile is not None:
+            return profile
+        if not (self._force or _hooks):
+            return None
+        global enabled
+        with _enabled_lock:
+            enabled += 1
+        self._profile = _state.profile = LoadProfile(self._path)
+        _state.phases = []
+        self._start = time.perf_counter()
+        return self._profile
+
+    def __exit__(self, *exc_info):
+        if self._profile is None:
+            return
+        global enabled
+        self._profile.total = time.perf_counter() - self._start
+        _state.profile = None
+        _state.phases = None
+        with _enabled_lock:
+            enabled -= 1
+        for hook in list(_hooks):
+            try:
+                hook(self._profile)
+            except Exception:
+                LOGGER.warning('Profiling hook %r failed', hook, exc_info=True)
+
+
+class _Phase():
+    __slots__ = ('_name', '_running')
+
+    def __init__(self, name: str):
+        self._name = name
+        self._running = None
+
+    def __enter__(self):
+        profile = getattr(_state, 'profile', None)
+        if profile is not None:
+            # [name, start, time spent in nested phases]
+            self._running = [self._name, time.perf_counter(), 0.0]
+            _state.phases.append(self._running)
+        return self
+
+    def __exit__(self, *exc_info):
+        running = self._running
+        if running is None:
+            return
+        self._running = None
+        elapsed = time.perf_counter() - running[1]
+        phases = _state.phases
+        phases.pop()
+        if phases:
+            phases[-1][2] += elapsed
+        profile = _state.profile
+        profile.phases[running[0]] = profile.phases.get(running[0], 0.0) + elapsed - running[2]
+
+
+def record_file(file_path: str, size: int = 0, read: float = 0.0, parse: float = None):
+    """ Adds the measures of a file to the current profile, if any (see `LoadProfile.add_file`). """
+    profile = getattr(_state, 'profile', None)
+    if profile is not None:
+        profile.add_file(file_path, size=size, read=read, parse=parse)
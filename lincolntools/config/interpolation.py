@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""Interpolation of the `${...}` references found in configuration values.
+
+Supported references, which can appear anywhere in a value and several times:
+
+* `${VAR}`: value of the environment variable `VAR` (empty string if it is not set)
+* `${VAR:-default}`: same, with a default value used when `VAR` is not set or empty (as in bash), which can itself
+  contain references (ex: `${A:-${B}}`)
+* `${config:path.to.key}`: value of another key of the configuration (dotted path, list positions allowed).
+  If the reference is the whole value, the referenced value is used as is (ex: an int or a dict), None if the key is missing.
+"""
+import functools
+import os
+import re
+import logging
+from collections.abc import Mapping
+from . import instrumentation
+
+LOGGER = logging.getLogger(__name__)
+
+#: re.Pattern[]: Regex which matches the environment variables format in configuration file (ex. ${VAR_ENV})
+ENV_PATTERN = re.compile(r'\$\{([^}^{]+)\}')
+#: re.Pattern[]: Regex which matches the scalars which contain at least one reference
+INTERPOLATION_PATTERN = re.compile(r'^.*\$\{.*\}', re.DOTALL)
+#: str: Prefix of the references to other keys of the configuration
+CONFIG_PREFIX = 'config:'
+
+
+@functools.lru_cache(maxsize=8192)
+def parse(value: str) -> tuple:
+    """ Splits a value into literal strings and references. Results are cached.
+
+    Args:
+        value (str): Raw value (ex: ${HOME}/data).
+    Returns:
+        tuple: Literal strings and ('env', name, default) or ('config', path, None) tuples, where default
+            is None or the parsed default value.
+    """
+    segments = []
+    position = literal_start = 0
+    while True:
+        start = value.find('${', position)
+        if start < 0:
+            break
+        end = _closing_brace(value, start + 2)
+        if end < 0:
+            # Unterminated reference: kept as a literal
+            break
+        if start > literal_start:
+            segments.append(value[literal_start:start])
+        segments.append(_parse_reference(value[start + 2:end]))
+        position = literal_start = end + 1
+    if literal_start < len(value):
+        segments.append(value[literal_start:])
+    return tuple(segments)
+
+
+def has_config_references(value: str) -> bool:
+    """ Returns True if the value references other keys of the configuration, which are only known once it is fully read. """
+    return CONFIG_PREFIX in value and any(_has_config_reference(segment) for segment in parse(value))
+
+
+class Interpolator():
+    """Resolves the references of the values of a configuration.
+
+    The environment is read once, when the interpolator is created, and results are cached by raw value:
+    a configuration with thousands of identical references only resolves each of them once.
+    Missing environment variables and keys are collected and reported in a single warning by `warn_missing`.
+    """
+
+    def __init__(self, environ: dict = None, root: object = None):
+        """Constructor of the Interpolator object.
+
+        Args:
+            environ (dict, optional): Environment variables. Defaults to a snapshot of `os.environ`.
+            root (object, optional): Configuration tree used by the `${config:...}` references. Defaults to None.
+        """
+        #: dict: environment variables used by the references
+        self.environ = dict(os.environ) if environ is None else environ
+        #: object: configuration tree used by the `${config:...}` references
+        self.root = root
+        #: set: names of the environment variables and paths of the keys which were not found
+        self.missing = set()
+        self._cache = {}
+        self._resolving = set()
+
+    def interpolate(self, value: str) -> object:
+        """ Returns a value with all its references replaced.
+
+        Args:
+            value (str): Raw value (ex: ${HOST:-localhost}:${PORT}).
+        Returns:
+            object: The interpolated string, or the referenced value if the whole value is a `${config:...}` reference.
+        """
+        try:
+            return self._cache[value]
+        except KeyError:
+            pass
+        segments = parse(value)
+        if len(segments) == 1 and isinstance(segments[0], tuple) and segments[0][0] == 'config':
+            result = self._lookup(segments[0][1])
+        else:
+            result = ''.join([self._render(segment) for segment in segments])
+        self._cache[value] = result
+        return result
+
+    def warn_missing(self):
+        """ Logs a single warning for all the references which were not found, then forgets them. """
+        if self.missing:
+            LOGGER.warning("No value for the following references : [%s]. Initializing them as empty strings "
+                           "(None for a whole value which references a missing key).", ', '.join(sorted(self.missing)))
+            self.missing = set()
+
+    def _render(self, segment) -> str:
+        if isinstance(segment, str):
+            return segment
+        kind, name, default = segment
+        if kind == 'config':
+            value = self._lookup(name)
+            return '' if value is None else str(value)
+        value = self.environ.get(name)
+        if value or (value is not None and default is None):
+            return value
+        if default is not None:
+            return ''.join([self._render(part) for part in default])
+        self.missing.add(name)
+        return ''
+
+    def _lookup(self, path: str) -> object:
+        node = self.root
+        for key in path.split('.'):
+            if isinstance(node, Mapping) and key in node:
+                node = node[key]
+            elif isinstance(node, (list, tuple)) and key.isdigit() and int(key) < len(node):
+                node = node[int(key)]
+            else:
+                self.missing.add(CONFIG_PREFIX + path)
+                return None
+        if isinstance(node, PLACEHOLDER_TYPES):
+            if path in self._resolving:
+                raise ValueError('Circular reference to {prefix}{path}'.format(prefix=CONFIG_PREFIX, path=path))
+            self._resolving.add(path)
+            try:
+                node = node.resolve(self)
+            finally:
+                self._resolving.discard(path)
+        return node
+
+
+def substitute(value: str, environ: dict = None) -> str:
+    """ Replaces the environment variables references of a string with their value.
+
+    Args:
+        value (str): Raw value read in the configuration file (ex: ${HOME}/data).
+        environ (dict, optional): Environment to read the variables from. Defaults to `os.environ`.
+    Returns:
+        str: The value with the environment variables substituted.
+    """
+    interpolator = Interpolator(os.environ if environ is None else environ)
+    result = interpolator.interpolate(value)
+    interpolator.warn_missing()
+    return result
+
+
+class EnvReference():
+    """Placeholder kept in the configuration tree instead of a value which contains references.
+    It is created when a configuration is read with `resolve_env=False`, so the parsed tree can be
+    stored (ex: on-disk cache) without being bound to the environment of the process that parsed it,
+    and for the values which reference other keys, resolved once the whole configuration is read.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: str):
+        #: str: raw scalar as written in the configuration file (ex: ${HOME}/data)
+        self.value = value
+
+    def resolve(self, interpolator: Interpolator = None) -> object:
+        """ Returns the value of the placeholder. """
+        if interpolator is None:
+            return substitute(self.value)
+        return interpolator.interpolate(self.value)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.value == self.value
+
+    def __hash__(self):
+        return hash((type(self), self.value))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.value)
+
+
+class JoinReference():
+    """Placeholder for a `!join` sequence whose parts contain at least one `EnvReference`."""
+    __slots__ = ('parts',)
+
+    def __init__(self, parts: list):
+        #: list: parts to concatenate, either plain values or placeholders
+        self.parts = parts
+
+    def resolve(self, interpolator: Interpolator = None) -> str:
+        """ Returns the concatenation of the resolved parts. """
+        if interpolator is None:
+            interpolator = Interpolator(os.environ)
+        return ''.join([str(resolve_value(part, interpolator)) for part in self.parts])
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.parts == self.parts
+
+    def __hash__(self):
+        return hash((type(self), tuple(self.parts)))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.parts)
+
+
+#: tuple: Types of the placeholders which can be found in a configuration tree
+PLACEHOLDER_TYPES = (EnvReference, JoinReference)
+
+
+def is_placeholder(value: object) -> bool:
+    """ Returns True if the value has to be resolved before being used. """
+    return isinstance(value, PLACEHOLDER_TYPES)
+
+
+def resolve_value(value: object, interpolator: Interpolator = None) -> object:
+    """ Resolves a single value, non placeholder values are returned as is. """
+    if isinstance(value, PLACEHOLDER_TYPES):
+        return value.resolve(interpolator)
+    return value
+
+
+def resolve(tree: object, environ: dict = None, interpolator: Interpolator = None) -> object:
+    """ Replaces in place every placeholder of a configuration tree with its value.
+
+    Args:
+        tree (object): Configuration tree (dict, list or scalar) read with `resolve_env=False`.
+        environ (dict, optional): Environment to read the variables from. Defaults to a snapshot of `os.environ`.
+        interpolator (Interpolator, optional): Interpolator to use (its `root` defaults to `tree`). Defaults to a new one.
+    Returns:
+        object: The resolved tree. Containers are updated in place and returned.
+    """
+    with instrumentation.phase('interpolation'):
+        return _resolve_tree(tree, environ, interpolator)
+
+
+def _resolve_tree(tree: object, environ: dict, interpolator: Interpolator) -> object:
+    if interpolator is None:
+        interpolator = Interpolator(environ)
+    if interpolator.root is None:
+        interpolator.root = tree
+    if isinstance(tree, PLACEHOLDER_TYPES):
+        return tree.resolve(interpolator)
+    # Containers shared through YAML anchors are only visited once
+    seen = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            items = dict.items(node)
+        elif isinstance(node, list):
+            items = enumerate(node)
+        else:
+            continue
+        for key, value in list(items):
+            if isinstance(value, PLACEHOLDER_TYPES):
+                node[key] = value.resolve(interpolator)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    interpolator.warn_missing()
+    return tree
+
+
+def _closing_brace(value: str, position: int) -> int:
+    # Index of the brace which closes a reference, nested references included
+    depth = 1
+    while position < len(value):
+        if value.startswith('${', position):
+            depth += 1
+            position += 2
+            continue
+        if value[position] == '}':
+            depth -= 1
+            if depth == 0:
+                return position
+        position += 1
+    return -1
+
+
+def _parse_reference(body: str) -> tuple:
+    if body.startswith(CONFIG_PREFIX):
+        return ('config', body[len(CONFIG_PREFIX):].strip(), None)
+    name, separator, default = body.partition(':-')
+    return ('env', name.strip(), parse(default) if separator else None)
+
+
+def _has_config_reference(segment) -> bool:
+    if isinstance(segment, str):
+        return False
+    kind, _, default = segment
+    return kind == 'config' or (default is not None and any(_has_config_reference(part) for part in default))
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import threading
+from collections.abc import Mapping
+from . import discovery
+from .config_loader import ConfigLoader
+from .frozen import _items
+
+LOGGER = logging.getLogger(__name__)
+
+#: tuple: Default layers of a LayeredConfig, in increasing priority
+DEFAULT_LAYERS = ('base', 'environment', 'local', 'runtime')
+
+_MISSING = object()
+# A layer defines an ancestor of the merged path as a value which is not a mapping
+_RESET = object()
+
+
+class LayeredConfig():
+    """Configuration made of layers (ex: base, environment overlay, local overrides, runtime overrides) deep-merged into an effective tree.
+
+    Mappings of the layers are merged recursively, any other value (lists included) replaces the one of the
+    lower layers. The effective tree is computed once and kept up to date: when a layer changes, only the
+    subtrees whose values differ are merged again. The layer each leaf comes from is tracked (see `source`).
+
+    Layers can be bound to a configuration file/folder (see `load_layer`): their references (`${VAR}`, `${config:a.b}`)
+    are resolved when they are loaded, within the layer.
+    """
+
+    def __init__(self, layers: tuple = DEFAULT_LAYERS, cache_dir: str = None):
+        """Constructor of the LayeredConfig object.
+
+        Args:
+            layers (tuple, optional): Names of the layers, in increasing priority. Defaults to `DEFAULT_LAYERS`.
+            cache_dir (str, optional): Folder of the compiled cache used to load the layers bound to files. Defaults to None (no cache).
+        """
+        if len(set(layers)) != len(layers):
+            raise ValueError('Layer names must be unique: {}'.format(layers))
+        #: tuple: names of the layers, in increasing priority
+        self.layers = tuple(layers)
+        #: str: folder of the compiled cache, None if the cache is disabled
+        self.cache_dir = cache_dir
+        #: int: number of subtrees merged again by the last update (monitoring)
+        self.remerged_count = 0
+        # layer name -> content of the layer
+        self._contents = {name: {} for name in self.layers}
+        # layer name -> (path to configuration file/folder, stamps of its files)
+        self._bindings = {}
+        self._conf = {}
+        # Same shape as the effective tree, with the name of the layer of each leaf
+        self._origins = {}
+        self._lock = threading.RLock()
+
+    @property
+    def conf(self) -> dict:
+        """ The effective tree. It is updated in place when a layer changes: do not modify it. """
+        return self._conf
+
+    def layer(self, name: str) -> dict:
+        """ Returns the content of a layer. """
+        return self._contents[self._check_layer(name)]
+
+    def set_layer(self, name: str, conf: dict) -> list:
+        """ Replaces the content of a layer and merges again the subtrees whose values changed.
+        The layer is not copied: it must not be modified afterwards, use `set` and `unset` or give a new dict.
+
+        Args:
+            name (str): Name of the layer.
+            conf (dict): New content of the layer.
+        Returns:
+            list: Paths (tuples of keys) of the subtrees merged again.
+        """
+        conf = conf or {}
+        with self._lock:
+            old = self._contents[self._check_layer(name)]
+            self._contents[name] = conf
+            return self._remerge(list(_changed_paths(old, conf)))
+
+    def set(self, path, value, layer: str = 'runtime') -> list:
+        """ Sets the value at a path of a layer (missing mappings are created) and merges again this path only.
+
+        Args:
+            path (str or tuple): Keys separated by dots, or tuple of keys.
+            value (object): New value.
+            layer (str, optional): Name of the layer. Defaults to `runtime`.
+        Returns:
+            list: Paths (tuples of keys) of the subtrees merged again.
+        Raises:
+            ValueError: Raised if the path goes through a list: lists are replaced as a whole, set the whole list.
+        """
+        path = _split(path)
+        with self._lock:
+            # Copy on write: the containers along the path are copied, the previous content is left unchanged
+            root = node = dict(self._contents[self._check_layer(layer)])
+            changed = path
+            effective = self._conf
+            for depth, key in enumerate(path[:-1]):
+                child = node.get(key, _MISSING)
+                effective = effective.get(key) if isinstance(effective, dict) else None
+                if isinstance(effective if child is _MISSING else child, (list, tuple)):
+                    raise ValueError('{} is a list, it cannot be set by element: {}'.format(
+                        '.'.join(str(key) for key in path[:depth + 1]), '.'.join(str(key) for key in path)))
+                if isinstance(child, Mapping):
+                    child = dict(child)
+                else:
+                    if changed is path and (child is not _MISSING or not isinstance(effective, dict)):
+                        # A value replaced by a mapping, or a mapping created over a value of a lower layer
+                        changed = path[:depth + 1]
+                    child = {}
+                node[key] = child
+                node = child
+            node[path[-1]] = value
+            self._contents[layer] = root
+            return self._remerge([changed])
+
+    def unset(self, path, layer: str = 'runtime') -> list:
+        """ Removes the value at a path of a layer, if any, and merges again this path only.
+        The mappings of the layer left empty along the path are removed too, so that they do not hide
+        the values of the lower layers: the path of the highest one is merged again instead.
+
+        Args:
+            path (str or tuple): Keys separated by dots, or tuple of keys.
+            layer (str, optional): Name of the layer. Defaults to `runtime`.
+        Returns:
+            list: Paths (tuples of keys) of the subtrees merged again.
+        """
+        path = _split(path)
+        with self._lock:
+            root = node = dict(self._contents[self._check_layer(layer)])
+            parents = []
+            for key in path[:-1]:
+                child = node.get(key)
+                if not isinstance(child, Mapping):
+                    return []
+                parents.append(node)
+                child = node[key] = dict(child)
+                node = child
+            if path[-1] not in node:
+                return []
+            del node[path[-1]]
+            changed = path
+            # Removes the emptied mappings, from the deepest one
+            for depth in range(len(parents) - 1, -1, -1):
+                if node:
+                    break
+                node = parents[depth]
+                del node[path[depth]]
+                changed = path[:depth + 1]
+            self._contents[layer] = root
+            return self._remerge([changed])
+
+    def bind_layer(self, name: str, path: str):
+        """ Binds a layer to a configuration file/folder, loaded by the next `reload`.
+
+        Args:
+            name (str): Name of the layer.
+            path (str): Path to configuration file/folder.
+        """
+        with self._lock:
+            self._bindings[self._check_layer(name)] = (path, None)
+
+    def load_layer(self, name: str, path: str) -> list:
+        """ Binds a layer to a configuration file/folder and loads it (see `ConfigLoader.load`).
+
+        Args:
+            name (str): Name of the layer.
+            path (str): Path to configuration file/folder.
+        Returns:
+            list: Paths (tuples of keys) of the subtrees merged again.
+        """
+        with self._lock:
+            self.bind_layer(name, path)
+            return self._load_layer(name)
+
+    def reload(self) -> list:
+        """ Loads the layers bound to files which changed since they were loaded (or were never loaded).
+
+        Returns:
+            list: Paths (tuples of keys) of the subtrees merged again.
+        """
+        remerged = []
+        with self._lock:
+            for name in self.layers:
+                if name in self._bindings:
+                    remerged.extend(self._load_layer(name))
+            self.remerged_count = len(remerged)
+        return remerged
+
+    def source(self, path):
+        """ Returns the name of the layer the value at a path comes from.
+
+        Args:
+            path (str or tuple): Keys separated by dots, or tuple of keys, of a value which is not a mapping.
+        Returns:
+            str: Name of the layer.
+        Raises:
+            KeyError: Raised if the path does not exist or is a mapping (see `sources`).
+        """
+        origin = self._origins
+        for key in _split(path):
+            if not isinstance(origin, dict) or key not in origin:
+                raise KeyError(path)
+            origin = origin[key]
+        if isinstance(origin, dict):
+            raise KeyError(path)
+        return origin
+
+    def sources(self, path=None, sep: str = '.') -> dict:
+        """ Returns the layer of every leaf of a subtree.
+
+        Args:
+            path (str or tuple, optional): Root of the subtree. Defaults to None (whole tree).
+            sep (str, optional): Separator of the keys in the returned paths. Defaults to `.`.
+        Returns:
+            dict: Layer names indexed by leaf path.
+        """
+        origin = self._origins
+        prefix = ()
+        if path:
+            prefix = _split(path)
+            for key in prefix:
+                if not isinstance(origin, dict) or key not in origin:
+                    raise KeyError(path)
+                origin = origin[key]
+        sources = {}
+        stack = [(prefix, origin)]
+        while stack:
+            keys, node = stack.pop()
+            if not isinstance(node, dict):
+                sources[sep.join(str(key) for key in keys)] = node
+                continue
+            stack.extend((keys + (key,), child) for key, child in node.items())
+        return sources
+
+    def _check_layer(self, name: str) -> str:
+        if name not in self._contents:
+            raise KeyError('Unknown layer {name}, expected one of {layers}'.format(name=name, layers=self.layers))
+        return name
+
+    def _load_layer(self, name: str) -> list:
+        path, stamps = self._bindings[name]
+        new_stamps = _stamps(path)
+        if new_stamps == stamps:
+            self.remerged_count = 0
+            return []
+        LOGGER.info('Loading layer %s from %s.', name, path)
+        self._bindings[name] = (path, new_stamps)
+        return self.set_layer(name, self._read(path))
+
+    def _read(self, path: str) -> dict:
+        if self.cache_dir is not None:
+            return ConfigLoader.load_cached(path, self.cache_dir) or {}
+        if os.path.isfile(path):
+            return ConfigLoader.load_from_file(path) or {}
+        return ConfigLoader.load_from_folder(path) or {}
+
+    def _remerge(self, paths: list) -> list:
+        for path in paths:
+            value, origin = self._merge_path(path)
+            self._apply(path, value, origin)
+        self.remerged_count = len(paths)
+        if paths:
+            LOGGER.debug('%d subtrees merged again.', len(paths))
+        return paths
+
+    def _merge_path(self, path: tuple) -> tuple:
+        value = origin = _MISSING
+        for name in self.layers:
+            node = self._contents[name]
+            for key in path:
+                if not isinstance(node, Mapping):
+                    node = _RESET
+                    break
+                node = node.get(key, _MISSING)
+                if node is _MISSING:
+                    break
+            if node is _MISSING:
+                continue
+            if node is _RESET:
+                # The lower layers are hidden by this one
+                value = origin = _MISSING
+                continue
+            value, origin = _merge(value, origin, node, name)
+        return value, origin
+
+    def _apply(self, path: tuple, value, origin):
+        if not path:
+            self._conf, self._origins = ({}, {}) if value is _MISSING else (value, origin)
+            return
+        node, origins = self._conf, self._origins
+        for key in path[:-1]:
+            node = node.get(key)
+            if not isinstance(node, dict):
+                # Hidden by a value of a higher layer
+                return
+            origins = origins[key]
+        if value is _MISSING:
+            node.pop(path[-1], None)
+            origins.pop(path[-1], None)
+        else:
+            node[path[-1]] = value
+            origins[path[-1]] = origin
+
+
+def merge(base: dict, *overrides) -> dict:
+    """ Deep-merges configurations: mappings are merged recursively, other values replace those of the previous configurations.
+    The given configurations are not modified.
+
+    Args:
+        base (dict): Configuration of lowest priority.
+        overrides (dict): Configurations merged over it, in increasing priority.
+    Returns:
+        dict: The merged configuration.
+    """
+    value = origin = _MISSING
+    for conf in (base,) + overrides:
+        value, origin = _merge(value, origin, conf or {}, None)
+    return value
+
+
+def _merge(value, origin, node, name: str) -> tuple:
+    if not isinstance(node, Mapping):
+        return node, name
+    if not isinstance(value, dict):
+        value, origin = {}, {}
+    for key, child in _items(node):
+        value[key], origin[key] = _merge(value.get(key, _MISSING), origin.get(key, _MISSING), child, name)
+    return value, origin
+
+
+def _changed_paths(old, new, prefix: tuple = ()):
+    """ Yields the paths of the smallest subtrees which differ between two trees. """
+    if old is new:
+        return
+    for key, old_value in _items(old):
+        new_value = new.get(key, _MISSING)
+        if isinstance(old_value, Mapping) and isinstance(new_value, Mapping):
+            yield from _changed_paths(old_value, new_value, prefix + (key,))
+        elif old_value is not new_value and (type(old_value) is not type(new_value) or old_value != new_value):
+            yield prefix + (key,)
+    for key, _ in _items(new):
+        if key not in old:
+            yield prefix + (key,)
+
+
+def _split(path) -> tuple:
+    if isinstance(path, str):
+        return tuple(path.split('.'))
+    return tuple(path)
+
+
+def _stamps(path: str) -> dict:
+    files = [path] if os.path.isfile(path) else ConfigLoader.find_yaml_files(path)
+    return discovery.file_stamps(files)
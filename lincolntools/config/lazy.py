@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import logging
+import re
+import threading
+import yaml
+from easydict import EasyDict
+from . import interpolation
+from .config_loader import ConfigLoader
+from .ondemand import OnDemandMapping
+
+LOGGER = logging.getLogger(__name__)
+
+#: re.Pattern[]: Regex which matches a top-level key of a YAML file (non indented `key:` line)
+TOP_LEVEL_KEY_MATCHER = re.compile(r'''^(?:"([^"]*)"|'([^']*)'|([^\s#&*!|>%@`'"{\[\-?][^#\n]*?))\s*:(?:\s|$)''', re.MULTILINE)
+#: str: YAML merge key, whose value is a mapping (or list of mappings) whose keys are added to the enclosing one
+MERGE_KEY = '<<'
+
+
+def scan_top_level_keys(file_path: str) -> list:
+    """ Finds the top-level keys of a YAML file without parsing it.
+    A top-level merge key (`<<: *defaults`) is not returned: the keys it adds are only known once the file is parsed.
+
+    Args:
+        file_path (str): Path to YAML file.
+    Returns:
+        list: Top-level keys of the file, as strings.
+    """
+    return _scan(file_path)[0]
+
+
+def _scan(file_path: str) -> tuple:
+    # (top-level keys, True if the file has a top-level merge key)
+    with open(file_path, 'r') as stream:
+        content = stream.read()
+    keys = [next(group for group in match.groups() if group is not None) for match in TOP_LEVEL_KEY_MATCHER.finditer(content)]
+    if MERGE_KEY not in keys:
+        return keys, False
+    return [key for key in keys if key != MERGE_KEY], True
+
+
+class LazyConfig(OnDemandMapping):
+    """Configuration of a folder whose files are only parsed when one of their top-level keys is accessed.
+
+    At creation, the files are only scanned to know which file defines which top-level key. A file is parsed
+    the first time one of its keys is read. When several files define the same key, the last one in the
+    concatenation order of `ConfigLoader.load_from_folder` wins.
+
+    Files with a top-level merge key (`<<: *defaults`) are parsed at creation, so the keys they merge are known.
+    Files are parsed independently: if a file uses an anchor defined in another one, the whole folder
+    is loaded at once (concatenated) instead. The references of a key are resolved when it is loaded,
+    `${config:...}` ones against the whole configuration (the referenced keys are loaded too).
+    """
+
+    def __init__(self, folder_path: str, wrap=EasyDict):
+        """Constructor of the LazyConfig object.
+
+        Args:
+            folder_path (str): Path to config folder.
+            wrap (callable, optional): Function applied to the dict values when they are loaded. Defaults to `EasyDict`.
+        """
+        #: str: path to the configuration folder
+        self.folder_path = folder_path
+        self._wrap = wrap
+        self._lock = threading.RLock()
+        # top-level key -> files which define it, in loading order
+        self._sources = {}
+        # top-level key -> loaded value
+        self._values = {}
+        # top-level keys removed with `del`, not found again when files are parsed
+        self._deleted = set()
+        # file path -> parsed content
+        self._parsed = {}
+        # whole folder content, only loaded if files cannot be parsed independently
+        self._folder_conf = None
+        # top-level keys being loaded, to detect circular references
+        self._loading = set()
+        # The environment is read once, when the configuration is created
+        self._interpolator = interpolation.Interpolator(root=self)
+        yaml_files = ConfigLoader.sort_by_basename(ConfigLoader.find_yaml_files(folder_path))
+        # file path -> position in the loading order
+        self._rank = {yaml_file: rank for rank, yaml_file in enumerate(yaml_files)}
+        merging_files = []
+        for yaml_file in yaml_files:
+            keys, merges = _scan(yaml_file)
+            if merges:
+                merging_files.append(yaml_file)
+            for key in keys:
+                sources = self._sources.setdefault(key, [])
+                if yaml_file not in sources:
+                    sources.append(yaml_file)
+        for yaml_file in merging_files:
+            self._parse(yaml_file)
+        LOGGER.info('%d top-level keys found in %s', len(self._sources), folder_path)
+
+    @property
+    def parsed_files(self) -> list:
+        """ Files parsed so far. """
+        return list(self._parsed)
+
+    def load_all(self):
+        """ Loads every key which was not loaded yet. """
+        for key in list(self._sources):
+            self[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+            self._deleted.add(key)
+
+    def __repr__(self) -> str:
+        return 'LazyConfig(%r, loaded=%r)' % (self.folder_path, sorted(self._values, key=str))
+
+    def _load(self, key):
+        if key in self._loading:
+            raise ValueError('Circular reference to {prefix}{key}'.format(prefix=interpolation.CONFIG_PREFIX, key=key))
+        self._loading.add(key)
+        try:
+            return interpolation.resolve(self._load_key(key), interpolator=self._interpolator)
+        finally:
+            self._loading.discard(key)
+
+    def _load_key(self, key):
+        found = False
+        value = None
+        for yaml_file in self._sources[key]:
+            parsed = self._parse(yaml_file)
+            if self._folder_conf is not None:
+                # Cross-file anchors: the values come from the concatenated files
+                parsed = self._folder_conf
+            if key in parsed:
+                found = True
+                value = parsed[key]
+        if not found:
+            # The scan found a key which is not in the parsed files (ex: key inside a multi-line string)
+            del self._sources[key]
+            raise KeyError(key)
+        return value
+
+    def _parse(self, yaml_file: str) -> dict:
+        if self._folder_conf is not None:
+            return self._folder_conf
+        if yaml_file in self._parsed:
+            return self._parsed[yaml_file]
+        try:
+            parsed = ConfigLoader.read_yaml_file(yaml_file, resolve_env=False) or {}
+        except yaml.composer.ComposerError as exc:
+            if not ConfigLoader.is_undefined_alias(exc):
+                raise
+            LOGGER.warning('Anchors are shared across files of %s, loading the whole folder.', self.folder_path)
+            self._folder_conf = ConfigLoader.load_from_folder(self.folder_path) or {}
+            # Every value now comes from the concatenated files: any source gives access to its keys
+            for key in self._folder_conf:
+                if key not in self._sources and key not in self._values and key not in self._deleted:
+                    self._sources[key] = [yaml_file]
+            return self._folder_conf
+        self._parsed[yaml_file] = parsed
+        # Keys the scan could not see (ex: not a string, merged with `<<`) are available once their file is parsed
+        for key in parsed:
+            if key in self._values or key in self._deleted:
+                continue
+            sources = self._sources.setdefault(key, [])
+            if yaml_file not in sources:
+                sources.append(yaml_file)
+                sources.sort(key=self._rank.get)
+        return parsed
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from collections.abc import MutableMapping
+
+
+class OnDemandMapping(MutableMapping):
+    """Base of the configurations whose top-level values are only loaded (parsed, decoded...) on first access.
+
+    Subclasses set `_sources` (top-level key -> where its value is loaded from), `_values` (top-level key -> loaded
+    value), `_lock` (reentrant if `_load` can access other keys) and `_wrap` (function applied to the loaded dicts),
+    and implement `_load`. Loaded values are memoized. Keys assigned or removed are only changed in memory.
+    """
+
+    def _load(self, key):
+        """ Returns the value of a top-level key which is in `_sources` and was not loaded yet. Called with `_lock` held.
+
+        Raises:
+            KeyError: Raised if the key turns out not to exist.
+        """
+        raise NotImplementedError
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            if key not in self._sources:
+                raise KeyError(key)
+            value = self._load(key)
+            if isinstance(value, dict):
+                value = self._wrap(value)
+            self._values[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._sources.pop(key, None)
+            self._values[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._values and key not in self._sources:
+                raise KeyError(key)
+            self._sources.pop(key, None)
+            self._values.pop(key, None)
+
+    def __iter__(self):
+        yield from list(self._values)
+        yield from [key for key in list(self._sources) if key not in self._values]
+
+    def __len__(self) -> int:
+        return len(self._values) + len([key for key in self._sources if key not in self._values])
+
+    def __contains__(self, key) -> bool:
+        return key in self._values or key in self._sources
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from .frozen import FrozenDict, _items
+
+LOGGER = logging.getLogger(__name__)
+
+#: int: Maximum number of instances of the default registry of `Config` (`Config.registry`)
+DEFAULT_MAX_SIZE = 128
+
+
+class InstanceRegistry():
+    """Named `Config` instances (ex: one per tenant), kept in memory in least recently used order.
+
+    Instances are evicted when there are more than `max_size` of them, when their estimated memory exceeds
+    `max_memory` (the most recently used one is always kept), or `ttl` seconds after they were loaded.
+    When several threads ask for the same missing instance, it is loaded once and all of them get it.
+    """
+
+    def __init__(self, max_size: int = None, max_memory: int = None, ttl: float = None, size_of=None):
+        """Constructor of the InstanceRegistry object.
+
+        Args:
+            max_size (int, optional): Maximum number of instances. Defaults to None (no limit).
+            max_memory (int, optional): Maximum estimated memory of the instances, in bytes. Defaults to None (no limit).
+            ttl (float, optional): Lifetime of an instance in seconds, it is loaded again on the next access. Defaults to None (no limit).
+            size_of (callable, optional): Function giving the memory of an instance in bytes. Defaults to `estimate_size` of its configuration.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError('max_size must be greater than 0')
+        #: int: maximum number of instances, None if there is no limit
+        self.max_size = max_size
+        #: int: maximum estimated memory of the instances in bytes, None if there is no limit
+        self.max_memory = max_memory
+        #: float: lifetime of an instance in seconds, None if there is no limit
+        self.ttl = ttl
+        #: callable: function giving the memory of an instance in bytes
+        self.size_of = size_of or (lambda instance: estimate_size(instance.conf))
+        # name -> (instance, estimated memory, load time), least recently used first
+        self._entries = OrderedDict()
+        # name -> load in progress
+        self._loading = {}
+        self._memory = 0
+        self._stats = dict.fromkeys(('hits', 'misses', 'shared_loads', 'failures', 'evicted_size', 'evicted_memory', 'expired'), 0)
+        self._lock = threading.Lock()
+
+    def get(self, name: str, factory):
+        """ Returns the instance registered under a name, loading it with `factory` if it is missing or expired.
+
+        Args:
+            name (str): Name of the instance.
+            factory (callable): Function called without arguments which returns the instance to register.
+        Returns:
+            Config: The registered instance.
+        Raises:
+            Exception: Raised by `factory`, in every thread waiting for this load. Nothing is registered.
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                if self.ttl is None or time.monotonic() - entry[2] < self.ttl:
+                    self._entries.move_to_end(name)
+                    self._stats['hits'] += 1
+                    return entry[0]
+                evicted = [self._evict(name, 'expired')]
+            else:
+                evicted = []
+            pending = self._loading.get(name)
+            owner = pending is None
+            if owner:
+                pending = self._loading[name] = _PendingLoad()
+                self._stats['misses'] += 1
+            else:
+                self._stats['shared_loads'] += 1
+        _stop(evicted)
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.instance
+
+        try:
+            instance = factory()
+            size = self.size_of(instance) if self.max_memory is not None else 0
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[name]
+                self._stats['failures'] += 1
+            pending.error = exc
+            pending.done.set()
+            raise
+        with self._lock:
+            del self._loading[name]
+            self._entries[name] = (instance, size, time.monotonic())
+            self._memory += size
+            evicted = self._shrink()
+        pending.instance = instance
+        pending.done.set()
+        _stop(evicted)
+        LOGGER.info('Config instance %s loaded, %d instances registered.', name, len(self._entries))
+        return instance
+
+    def peek(self, name: str):
+        """ Returns the instance registered under a name without loading it nor changing its rank,
+        None if there is none or if it expired (it is then loaded again by the next `get`).
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or (self.ttl is not None and time.monotonic() - entry[2] >= self.ttl):
+                return None
+            return entry[0]
+
+    def remove(self, name: str) -> bool:
+        """ Unregisters an instance (its watch mode is stopped).
+
+        Returns:
+            bool: True if an instance was registered under the name.
+        """
+        with self._lock:
+            if name not in self._entries:
+                return False
+            evicted = [self._evict(name, None)]
+        _stop(evicted)
+        return True
+
+    def clear(self):
+        """ Unregisters every instance. The statistics are kept. """
+        with self._lock:
+            evicted = [self._evict(name, None) for name in list(self._entries)]
+        _stop(evicted)
+
+    def names(self) -> list:
+        """ Returns the names of the registered instances, least recently used first. """
+        return list(self._entries)
+
+    def stats(self) -> dict:
+        """ Returns the counters of the registry: hits, misses (loads), shared_loads (requests served by the load of
+        another thread), failures, evicted_size, evicted_memory, expired, along with the current number of instances
+        (size) and their estimated memory in bytes (memory, only estimated when `max_memory` is set).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['memory'] = self._memory
+        return stats
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _shrink(self) -> list:
+        evicted = []
+        if self.ttl is not None:
+            now = time.monotonic()
+            for name in [name for name, entry in self._entries.items() if now - entry[2] >= self.ttl]:
+                evicted.append(self._evict(name, 'expired'))
+        while self.max_size is not None and len(self._entries) > self.max_size:
+            evicted.append(self._evict(next(iter(self._entries)), 'evicted_size'))
+        while self.max_memory is not None and self._memory > self.max_memory and len(self._entries) > 1:
+            evicted.append(self._evict(next(iter(self._entries)), 'evicted_memory'))
+        return evicted
+
+    def _evict(self, name: str, reason: str):
+        instance, size, _ = self._entries.pop(name)
+        self._memory -= size
+        if reason is not None:
+            self._stats[reason] += 1
+            LOGGER.info('Config instance %s evicted (%s).', name, reason)
+        return instance
+
+
+class _PendingLoad():
+    __slots__ = ('done', 'instance', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.instance = None
+        self.error = None
+
+
+def _stop(instances: list):
+    # Outside of the registry lock: stopping a watcher waits for its thread
+    for instance in instances:
+        stop_watching = getattr(instance, 'stop_watching', None)
+        if stop_watching is not None:
+            stop_watching()
+
+
+def estimate_size(value: object) -> int:
+    """ Estimates the memory of a configuration tree in bytes (containers, keys and values, shared ones counted once).
+    Mappings loaded on access (lazy, deferred or shared configurations) are not walked: only their own size is counted.
+
+    Args:
+        value (object): Configuration tree.
+    Returns:
+        int: Estimated memory in bytes.
+    """
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        size += sys.getsizeof(node)
+        if isinstance(node, dict):
+            for key, child in _items(node):
+                stack.append(key)
+                stack.append(child)
+            # EasyDict also stores the values as attributes
+            attributes = getattr(node, '__dict__', None)
+            if attributes:
+                size += sys.getsizeof(attributes)
+        elif isinstance(node, FrozenDict):
+            stack.append(node._data)
+        elif isinstance(node, (list, tuple)):
+            stack.extend(node)
+    return size
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import re
+import threading
+from collections.abc import Mapping
+import yaml
+from . import discovery
+from .config_loader import ConfigLoader
+
+LOGGER = logging.getLogger(__name__)
+
+#: re.Pattern[]: Regex which matches a leaf specification of a schema file (ex: `int(0, 65535)`, `str?`)
+SPEC_MATCHER = re.compile(r'^\s*(\w+)\s*(\?)?\s*(?:\(\s*([^,()]*?)\s*,\s*([^,()]*?)\s*\))?\s*$')
+#: re.Pattern[]: Regex which matches a template value (ex: `<123>`)
+TEMPLATE_VALUE_MATCHER = re.compile(r'^<(.*)>$', re.DOTALL)
+
+#: dict: Python types accepted by each type name of a specification
+TYPES = {
+    'str': (str,),
+    'int': (int,),
+    'float': (int, float),
+    'number': (int, float),
+    'bool': (bool,),
+    'list': (list, tuple),
+    'dict': (Mapping,),
+    'any': (object,),
+}
+
+
+class SchemaError(ValueError):
+    """Raised when a configuration does not match its schema. `errors` lists every (path, message) found."""
+
+    def __init__(self, errors: list):
+        #: list: (dotted path, message) tuples
+        self.errors = errors
+        super().__init__('\n'.join('{}: {}'.format(path or '<root>', message) for path, message in errors))
+
+
+class _Leaf():
+    """Compiled validator of a value: type and optional range (value for numbers, length otherwise).
+    With `numeric_strings`, strings holding a number (ex: an interpolated `${PORT}`) are accepted as numbers.
+    """
+    __slots__ = ('type_name', 'types', 'minimum', 'maximum', 'numeric_strings')
+
+    def __init__(self, type_name: str, minimum=None, maximum=None, numeric_strings: bool = False):
+        self.type_name = type_name
+        self.types = TYPES[type_name]
+        self.minimum = minimum
+        self.maximum = maximum
+        self.numeric_strings = numeric_strings
+
+    def validate(self, value, path: str, errors: list):
+        if self.numeric_strings and isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                errors.append((path, 'expected {}, got {}'.format(self.type_name, 'str')))
+                return
+        # bool is a subclass of int: it is only accepted by `bool` and `any`
+        if not isinstance(value, self.types) or (isinstance(value, bool) and self.type_name not in ('bool', 'any')):
+            errors.append((path, 'expected {}, got {}'.format(self.type_name, type(value).__name__)))
+            return
+        if self.minimum is None and self.maximum is None:
+            return
+        measure = value if self.type_name in ('int', 'float', 'number') else len(value)
+        if self.minimum is not None and measure < self.minimum:
+            errors.append((path, '{} is lower than the minimum {}'.format(measure, self.minimum)))
+        if self.maximum is not None and measure > self.maximum:
+            errors.append((path, '{} is greater than the maximum {}'.format(measure, self.maximum)))
+
+
+class _Section():
+    """Compiled validator of a mapping: its keys, whether they are required, and their own validators."""
+    __slots__ = ('children',)
+
+    def __init__(self, children: list):
+        # (key, required, validator) tuples
+        self.children = children
+
+    def validate(self, value, path: str, errors: list):
+        if not isinstance(value, (dict, Mapping)):
+            errors.append((path, 'expected dict, got {}'.format(type(value).__name__)))
+            return
+        prefix = path + '.' if path else ''
+        for key, required, validator in self.children:
+            if key in value:
+                validator.validate(value[key], prefix + str(key), errors)
+            elif required:
+                errors.append((prefix + str(key), 'missing required key'))
+
+
+class Schema():
+    """Compiled schema of a configuration: required keys, types and ranges, checked in a single traversal.
+
+    A schema is compiled from a typed schema (mapping whose leaves are specifications like `int(0, 65535)`,
+    `str?` or `list(1,)`, and whose optional sections have a key ending with `?`) or from a `.template` file,
+    in which every key is required and types are inferred from the example values (ex: `<123>` is a number).
+    Inferred numbers also accept numeric strings, as values interpolated from environment variables are strings.
+    Compiled schemas of files are cached until the file changes.
+    """
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, root: _Section):
+        self._root = root
+
+    @staticmethod
+    def compile(spec: dict) -> 'Schema':
+        """ Compiles a typed schema.
+
+        Args:
+            spec (dict): Typed schema (see the class documentation).
+        Returns:
+            Schema: The compiled schema.
+        Raises:
+            ValueError: Raised if a specification is invalid.
+        """
+        return Schema(Schema._compile_section(spec or {}, Schema._compile_spec))
+
+    @staticmethod
+    def compile_template(template: dict) -> 'Schema':
+        """ Compiles a parsed template: every key is required, types are inferred from the example values.
+
+        Args:
+            template (dict): Parsed template.
+        Returns:
+            Schema: The compiled schema.
+        """
+        return Schema(Schema._compile_section(template or {}, Schema._infer_spec))
+
+    @staticmethod
+    def from_file(schema_path: str) -> 'Schema':
+        """ Returns the compiled schema of a file: a template if its extension is `.template`, a typed schema otherwise.
+        Schemas are compiled once and cached until the file changes.
+
+        Args:
+            schema_path (str): Path to the schema or template file.
+        Returns:
+            Schema: The compiled schema.
+        """
+        schema_path = os.path.abspath(schema_path)
+        stamp = discovery.file_stamp(schema_path)
+        with Schema._cache_lock:
+            cached = Schema._cache.get(schema_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        spec = ConfigLoader.read_yaml_file(schema_path, resolve_env=False)
+        if schema_path.endswith('.template'):
+            schema = Schema.compile_template(spec)
+        else:
+            schema = Schema.compile(spec)
+        with Schema._cache_lock:
+            Schema._cache[schema_path] = (stamp, schema)
+        return schema
+
+    def validate(self, conf: dict) -> list:
+        """ Checks a configuration against the schema.
+
+        Args:
+            conf (dict): Configuration (ex: result of `ConfigLoader.load`).
+        Returns:
+            list: (dotted path, message) tuples, empty if the configuration is valid.
+        """
+        errors = []
+        self._root.validate(conf, '', errors)
+        return errors
+
+    def check(self, conf: dict):
+        """ Same as `validate` but raises a `SchemaError` if the configuration is invalid. """
+        errors = self.validate(conf)
+        if errors:
+            raise SchemaError(errors)
+
+    @staticmethod
+    def _compile_section(spec: dict, compile_leaf) -> _Section:
+        children = []
+        for key, value in spec.items():
+            required = True
+            if isinstance(key, str) and key.endswith('?') and compile_leaf is Schema._compile_spec:
+                key, required = key[:-1], False
+            if isinstance(value, Mapping):
+                children.append((key, required, Schema._compile_section(value, compile_leaf)))
+            else:
+                leaf, leaf_required = compile_leaf(value)
+                children.append((key, required and leaf_required, leaf))
+        return _Section(children)
+
+    @staticmethod
+    def _compile_spec(spec) -> tuple:
+        match = SPEC_MATCHER.match(spec) if isinstance(spec, str) else None
+        if match is None or match.group(1) not in TYPES:
+            raise ValueError('Invalid schema specification: {!r}'.format(spec))
+        type_name, optional, minimum, maximum = match.groups()
+        return _Leaf(type_name, Schema._bound(minimum), Schema._bound(maximum)), optional is None
+
+    @staticmethod
+    def _infer_spec(value) -> tuple:
+        if isinstance(value, str) and value in TYPES:
+            # Templates may also give the expected type name (ex: `port: int`)
+            return _Leaf(value), True
+        match = TEMPLATE_VALUE_MATCHER.match(value) if isinstance(value, str) else None
+        if match is not None:
+            try:
+                value = yaml.safe_load(match.group(1))
+            except yaml.YAMLError:
+                value = match.group(1)
+        if isinstance(value, bool):
+            return _Leaf('bool'), True
+        if isinstance(value, (int, float)):
+            # Example values do not tell if the configuration gives a literal or a `${VAR}` reference
+            return _Leaf('number', numeric_strings=True), True
+        if isinstance(value, (list, tuple)):
+            return _Leaf('list'), True
+        if isinstance(value, Mapping):
+            return _Leaf('dict'), True
+        if value is None:
+            return _Leaf('any'), True
+        return _Leaf('str'), True
+
+    @staticmethod
+    def _bound(value: str):
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
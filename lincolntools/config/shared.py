@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+from .cache import is_trusted
+from .frozen import freeze, thaw
+from .ondemand import OnDemandMapping
+
+LOGGER = logging.getLogger(__name__)
+
+#: bytes: First bytes of a published configuration file, with the version of its layout
+MAGIC = b'LTCSHM1\n'
+# Size of the pickled index, right after the magic bytes
+_HEADER = struct.Struct('<Q')
+# Users whose publications are decoded: the current user and root (ex: configuration published by a service manager)
+_TRUSTED_OWNERS = (os.getuid(), 0) if hasattr(os, 'getuid') else None
+
+
+def publish(conf: dict, shared_path: str):
+    """ Writes a configuration in a file which processes can map in memory with `SharedConfig`.
+
+    Each top-level section is pickled separately and its position is stored in an index at the beginning
+    of the file, so that readers only decode the sections they use. The file is written in a temporary
+    file then renamed: processes attached to the previous version keep reading it.
+
+    Args:
+        conf (dict): Configuration to publish (`dict`, `EasyDict`, `FrozenDict`...). References are resolved.
+        shared_path (str): Path to the published file, ideally on a memory file system (ex: /dev/shm).
+            The file is only writable by its owner, readers check it (see `SharedConfig`).
+    """
+    blobs = []
+    index = {}
+    offset = 0
+    # Offsets are relative to the end of the index
+    for key, value in thaw(conf).items():
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        index[key] = (offset, len(blob))
+        blobs.append(blob)
+        offset += len(blob)
+    index_blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = '{path}.{pid}.tmp'.format(path=shared_path, pid=os.getpid())
+    try:
+        with open(tmp_path, 'wb') as stream:
+            stream.write(MAGIC)
+            stream.write(_HEADER.pack(len(index_blob)))
+            stream.write(index_blob)
+            for blob in blobs:
+                stream.write(blob)
+            # Readers refuse a file which other users can write to, whatever the umask
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, shared_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    LOGGER.info('Configuration published in %s (%d sections, %d bytes)', shared_path, len(index), offset)
+
+
+class SharedConfig(OnDemandMapping):
+    """Configuration published with `publish`, mapped in memory and decoded one top-level section at a time.
+
+    Attaching only reads the index of the file: there is nothing to parse. The file is mapped read-only,
+    so its pages are shared by every process attached to it, and a section is only decoded (then memoized)
+    the first time it is accessed. Sections are frozen by default, as the published configuration is shared.
+    Keys assigned in a process are only visible in this process.
+
+    Sections are pickled, so decoding them runs code chosen by whoever wrote the file: the published file is
+    trusted only if it belongs to the current user or to root, and if neither its group nor other users can write to it.
+    """
+
+    def __init__(self, shared_path: str, wrap=freeze):
+        """Constructor of the SharedConfig object.
+
+        Args:
+            shared_path (str): Path to a file written by `publish`.
+            wrap (callable, optional): Function applied to the dict values when they are decoded. Defaults to `freeze`.
+
+        Raises:
+            ValueError: Raised if the file was not written by `publish`, or if it is not trusted (see above).
+        """
+        #: str: path to the published configuration
+        self.shared_path = shared_path
+        self._wrap = wrap
+        self._lock = threading.Lock()
+        with open(shared_path, 'rb') as stream:
+            # Checked on the opened file: it cannot be replaced between the check and the mapping
+            if not is_trusted(stream.fileno(), owners=_TRUSTED_OWNERS):
+                raise ValueError('{} is not trusted: it belongs to another user or other users can write to it.'.format(shared_path))
+            # The mapping stays valid once the file is closed (or replaced by a new publication)
+            self._buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError('{} is not a published configuration.'.format(shared_path))
+        start = len(MAGIC) + _HEADER.size
+        index_size, = _HEADER.unpack_from(self._buffer, len(MAGIC))
+        # top-level key -> (offset, size) of its pickled value
+        self._sources = pickle.loads(self._buffer[start:start + index_size])
+        self._data_start = start + index_size
+        # top-level key -> decoded value
+        self._values = {}
+
+    @property
+    def decoded_keys(self) -> list:
+        """ Top-level keys decoded (or assigned) so far. """
+        return list(self._values)
+
+    def _load(self, key):
+        offset, size = self._sources[key]
+        start = self._data_start + offset
+        # Decoded from the mapped pages, without copying the section first
+        view = memoryview(self._buffer)[start:start + size]
+        try:
+            return pickle.loads(view)
+        finally:
+            view.release()
+
+    def __repr__(self) -> str:
+        return 'SharedConfig(%r, decoded=%r)' % (self.shared_path, sorted(self._values, key=str))
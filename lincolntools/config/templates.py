@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+from collections.abc import Mapping
+from .config_loader import ConfigLoader
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TemplateReport():
+    """Result of the validation of every configuration file of a folder against its template."""
+
+    def __init__(self):
+        #: list: configuration files compared with their template
+        self.checked = []
+        #: dict: keys missing in the template (ex: root['foo']['bar']) indexed by configuration file
+        self.mismatches = {}
+        #: list: configuration files without template
+        self.missing_templates = []
+        #: dict: error message indexed by file, for the files which could not be read or parsed
+        self.errors = {}
+
+    @property
+    def ok(self) -> bool:
+        """ True if every checked file matches its template. Files without template are not taken into account. """
+        return not self.mismatches and not self.errors
+
+    def raise_for_mismatches(self):
+        """ Raises a ValueError listing every mismatch and error, if any. """
+        if self.ok:
+            return
+        lines = ['{name} - The following keys were not found in template file: {err}'.format(name=path, err=keys)
+                 for path, keys in sorted(self.mismatches.items())]
+        lines += ['{name} - {err}'.format(name=path, err=error) for path, error in sorted(self.errors.items())]
+        raise ValueError('\n'.join(lines))
+
+    def __str__(self):
+        return 'TemplateReport(checked={}, mismatches={}, missing_templates={}, errors={})'.format(
+            len(self.checked), len(self.mismatches), len(self.missing_templates), len(self.errors))
+
+
+def template_path_of(config_path: str) -> str:
+    """ Returns the path of the template of a configuration file (same name with the `.template` extension). """
+    return '{path}.template'.format(path=os.path.splitext(config_path)[0])
+
+
+def find_template_pairs(folder_path: str) -> list:
+    """ Finds the configuration files of a folder and their template.
+
+    Args:
+        folder_path (str): Path to config folder.
+    Returns:
+        list: (configuration file, template file) tuples, the template file being None if it does not exist.
+    """
+    pairs = []
+    for config_path in ConfigLoader.sort_by_basename(ConfigLoader.find_yaml_files(folder_path)):
+        template_path = template_path_of(config_path)
+        pairs.append((config_path, template_path if os.path.isfile(template_path) else None))
+    return pairs
+
+
+def missing_keys(config: object, template: object, path: str = 'root') -> list:
+    """ Compares the key structure of a configuration with its template.
+
+    Args:
+        config (object): Parsed configuration.
+        template (object): Parsed template.
+        path (str, optional): Path of the compared elements, used in the result. Defaults to 'root'.
+    Returns:
+        list: Paths (ex: root['foo']['bar']) of the configuration keys which are not in the template.
+            Sub-keys of a missing key are not listed.
+    """
+    missing = []
+    if not isinstance(config, Mapping) or not isinstance(template, Mapping):
+        return missing
+    for key, value in config.items():
+        key_path = '{path}[{key!r}]'.format(path=path, key=key)
+        if key not in template:
+            missing.append(key_path)
+        else:
+            missing.extend(missing_keys(value, template[key], key_path))
+    return missing
+
+
+def check_folder_templates(folder_path: str, max_workers: int = 1) -> TemplateReport:
+    """ Checks every configuration file of a folder against its template, and reports all the mismatches.
+    Each file is parsed once and only the key structures are compared. Unlike `ConfigLoader.check_template_match`,
+    nothing is raised: see `TemplateReport.raise_for_mismatches`.
+
+    Args:
+        folder_path (str): Path to config folder.
+        max_workers (int, optional): Number of processes used to parse and compare the files.
+            Defaults to 1 (current process). None means the number of processors.
+    Returns:
+        TemplateReport: Result of the validation.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    report = TemplateReport()
+    pairs = []
+    for config_path, template_path in find_template_pairs(folder_path):
+        if template_path is None:
+            report.missing_templates.append(config_path)
+        else:
+            pairs.append((config_path, template_path))
+
+    if max_workers > 1 and len(pairs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_check_pair, pairs, chunksize=max(1, len(pairs) // (max_workers * 4))))
+    else:
+        results = [_check_pair(pair) for pair in pairs]
+
+    for (config_path, _), (missing, error) in zip(pairs, results):
+        report.checked.append(config_path)
+        if error is not None:
+            report.errors[config_path] = error
+        elif missing:
+            report.mismatches[config_path] = missing
+    LOGGER.info('Templates check of %s: %s', folder_path, report)
+    return report
+
+
+def _check_pair(pair: tuple) -> tuple:
+    # Module level function so it can be sent to the workers of a process pool
+    config_path, template_path = pair
+    try:
+        # Only keys are compared: environment variables do not need to be substituted
+        config = ConfigLoader.read_yaml_file(config_path, resolve_env=False)
+        template = ConfigLoader.read_yaml_file(template_path, resolve_env=False)
+    except Exception as exc:
+        return None, '{}: {}'.format(type(exc).__name__, exc)
+    return missing_keys(config, template), None
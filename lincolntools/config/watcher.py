@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+import logging
+import os
+import threading
+from . import discovery
+from .config_loader import ConfigLoader
+
+# Optional dependency: native file system notifications (inotify on Linux), imported when a watcher starts
+HAS_WATCHDOG = importlib.util.find_spec('watchdog') is not None
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConfigWatcher():
+    """Watches the YAML files of a configuration file/folder and calls a function when they change.
+
+    File system notifications are used when the `watchdog` package is installed (inotify on Linux),
+    otherwise the files are polled every `interval` seconds. In both cases the function is only called
+    when the size or the modification time of a file changed, or when a file was added or removed.
+    """
+
+    def __init__(self, path: str, on_change, interval: float = 1.0, use_polling: bool = False):
+        """Constructor of the ConfigWatcher object.
+
+        Args:
+            path (str): The path to configuration file/folder.
+            on_change (callable): Function called without arguments, from the watcher thread, when files changed.
+            interval (float, optional): Polling period in seconds, also the delay used to group the notifications
+                of a single update when notifications are available. Defaults to 1.0.
+            use_polling (bool, optional): Poll the files even if notifications are available. Defaults to False.
+        """
+        #: str: path to the watched configuration file/folder
+        self.path = path
+        #: callable: function called when files changed
+        self.on_change = on_change
+        #: float: polling period in seconds
+        self.interval = interval
+        #: bool: True if files are polled, False if file system notifications are used
+        self.use_polling = use_polling or not HAS_WATCHDOG
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+        self._snapshot = None
+
+    def snapshot(self) -> dict:
+        """ Returns the size and modification time of every watched file.
+
+        Returns:
+            dict: (size, modification time) tuples indexed by file path.
+        """
+        if os.path.isfile(self.path):
+            files = [self.path]
+        else:
+            files = ConfigLoader.find_yaml_files(self.path)
+        return discovery.file_stamps(files, skip_missing=True)
+
+    @property
+    def running(self) -> bool:
+        """ True if the watcher thread is alive. """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """ Starts watching the files in a background thread. """
+        if self.running:
+            return
+        self._stop.clear()
+        self._snapshot = self.snapshot()
+        if not self.use_polling:
+            watched = self.path if os.path.isdir(self.path) else os.path.dirname(os.path.abspath(self.path))
+            from watchdog.observers import Observer
+            self._observer = Observer()
+            watched_file = None if os.path.isdir(self.path) else os.path.abspath(self.path)
+            self._observer.schedule(_wake_up_handler(self._wake, watched_file), watched, recursive=True)
+            self._observer.start()
+        self._thread = threading.Thread(target=self._run, name='ConfigWatcher', daemon=True)
+        self._thread.start()
+        LOGGER.info('Watching configuration at %s (%s)', self.path, 'polling' if self.use_polling else 'notifications')
+
+    def stop(self):
+        """ Stops watching the files and waits for the watcher thread. """
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.use_polling:
+                self._wake.wait(self.interval)
+            else:
+                self._wake.wait()
+                # An update usually triggers several notifications: wait for the last ones
+                self._stop.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            snapshot = self.snapshot()
+            if snapshot == self._snapshot:
+                continue
+            self._snapshot = snapshot
+            try:
+                self.on_change()
+            except Exception:
+                LOGGER.exception('Error while handling the configuration change of %s', self.path)
+
+
+def _wake_up_handler(wake: threading.Event, watched_file: str = None):
+    """ Returns a watchdog event handler which wakes the watcher thread up when a YAML file or the watched file
+    (whatever its extension, ex: a published configuration) is modified. """
+    from watchdog.events import FileSystemEventHandler
+
+    class WakeUpHandler(FileSystemEventHandler):
+
+        def on_any_event(self, event):
+            if _wakes_up(event, watched_file):
+                wake.set()
+
+    return WakeUpHandler()
+
+
+def _wakes_up(event, watched_file: str = None) -> bool:
+    # The destination of a move is the new version of a file replaced with `os.replace` (ex: `publish`)
+    paths = [os.fsdecode(path) for path in (getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')) if path]
+    if event.is_directory or any(path.endswith(('.yaml', '.yml')) for path in paths):
+        return True
+    return watched_file is not None and any(os.path.abspath(path) == watched_file for path in paths)
@@ -39,6 +39,7 @@ setup(
     description="Python tool to load config files",
     download_url="https://github.com/Lincoln-France/lincolntools-config/archive/refs/tags/v1.0.5.tar.gz",
     install_requires=prod_requirements,
+    extras_require={'watch': ['watchdog']},
     long_description=readme + '\n\n' + history,
     long_description_content_type="text/markdown",
     include_package_data=True,
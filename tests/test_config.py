@@ -4,9 +4,16 @@
 # """Tests for `lincolntools-config` package."""
 
 import os
+import asyncio
+import datetime
+import io
+import json
+import subprocess
+import sys
+import threading
 import pytest
 
-from lincolntools.config import Config
+from lincolntools.config import Config, ConfigLoader
 
 FIXTURE_DIR = os.path.join(
     os.path.dirname(os.path.realpath(__file__)),
@@ -93,6 +100,10 @@ def test_flatten(datafiles):
     assert p['tar'] == 'test'
     assert p['var'] == 'variation'
 
+    # Nested in-place update
+    config['foo']['bar'] = 42
+    assert config.flatten()['foo-bar'] == 42
+
     Config.clear()
 
 
@@ -114,3 +125,307 @@ def test_get_default():
     assert config.get('not_exists', 0) == 0
 
     Config.clear()
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_reload(datafiles):
+    filenames = [str(f) for f in datafiles.listdir()]
+    config = Config(filenames[0])
+    versions = []
+    config.add_change_callback(lambda c: versions.append(c['_version']))
+
+    with open(filenames[0], 'a') as stream:
+        stream.write('\nnew_key: 1\n')
+    config.reload()
+    assert config['new_key'] == 1
+    assert config['foo']['bar'] == 1
+    assert versions == [2]
+    Config.clear()
+
+    with pytest.raises(ValueError):
+        Config().reload()
+    Config.clear()
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part1')
+)
+def test_watch(datafiles):
+    config = Config(datafiles.strpath)
+    reloaded = threading.Event()
+    config.add_change_callback(lambda c: 'other' in c and reloaded.set())
+    config.watch(interval=0.05, use_polling=True)
+    try:
+        with open(os.path.join(datafiles.strpath, 'other.yaml'), 'w') as stream:
+            stream.write('other:\n    key: value\n')
+        assert reloaded.wait(5)
+        assert config['other']['key'] == 'value'
+        assert config['part1']['port'] == 12345
+        assert config['_version'] >= 2
+    finally:
+        Config.clear()
+    assert config._watcher is None
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part1')
+)
+def test_watch_notifications(datafiles):
+    pytest.importorskip('watchdog')
+    config = Config(datafiles.strpath)
+    reloaded = threading.Event()
+    config.add_change_callback(lambda c: 'other' in c and reloaded.set())
+    config.watch(interval=0.05)
+    try:
+        assert not config._watcher.use_polling
+        with open(os.path.join(datafiles.strpath, 'other.yaml'), 'w') as stream:
+            stream.write('other:\n    key: value\n')
+        assert reloaded.wait(5)
+        assert config['other']['key'] == 'value'
+    finally:
+        Config.clear()
+    assert config._watcher is None
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'config.yaml')
+)
+def test_get_path(datafiles):
+    filenames = [str(f) for f in datafiles.listdir()]
+    config = Config(filenames[0])
+
+    assert config.get_path('foo.bar') == 'text'
+    assert config.get_path('data.list.1') == 2
+    assert config.get_path('data.dict') == {'from': 'to'}
+    assert config.get_path('data.list.3') is None
+    assert config.get_path('data.missing', 'default') == 'default'
+    assert config.get_path('mode.other', 0) == 0
+
+    config['items'] = [{'name': 'first'}, {'name': 'second'}]
+    assert config.get_path('items.1.name') == 'second'
+
+    # In place modifications
+    config['foo']['bar'] = {'test': 10}
+    assert config.get_path('foo.bar.test') == 10
+    config['data']['int'] = 2
+    assert config.get_path('data.int') == 2
+    del config['data']['int']
+    assert config.get_path('data.int', -1) == -1
+    # Nested containers replaced in place
+    config['data']['list'] = [9, 8, 7]
+    assert config.get_path('data.list.1') == 8
+    config['data']['dict'] = {'x': 1}
+    assert config.get_path('data.dict.from') is None
+    assert config.get_many(['data.dict.x', 'data.list.2']) == [1, 7]
+    Config.clear()
+
+
+def test_iter_flatten():
+    config = Config()
+    config['a'] = {'b': {'c': 1, '_private': 2}, 'list': [1, {'d': 2}, []], 'empty': {}}
+    config['ab'] = 3
+
+    assert list(config.iter_flatten()) == [('a-b-c', 1), ('a-list-0', 1), ('a-list-1-d', 2), ('ab', 3)]
+    assert list(config.iter_flatten(sep='.', prefix='a.list')) == [('a.list.0', 1), ('a.list.1.d', 2)]
+    assert list(config.iter_flatten(prefix='ab')) == [('ab', 3)]
+    assert list(config.iter_flatten('a', prefix='b')) == [('b-c', 1)]
+    assert list(config.iter_flatten('ab')) == [('', 3)]
+    assert config._flatten(['root'], {'x': [1]}) == [('root-x-0', 1)]
+
+    assert config.flatten(prefix='a-b') == {'a-b-c': 1}
+    flat = config.flatten()
+    flat['a-b-c'] = 0
+    assert config.flatten()['a-b-c'] == 1
+
+    # Not cached: the configuration can be modified in place
+    config['z'] = 'new'
+    assert config.flatten()['z'] == 'new'
+    config['a']['b']['c'] = 5
+    assert config.flatten()['a-b-c'] == 5
+    Config.clear()
+
+
+def test_flatten_frozen_cache(tmpdir, monkeypatch):
+    filename = str(tmpdir.join('frozen.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('a:\n  b: 1\n')
+    config = Config(filename, frozen=True)
+    assert config.flatten() == {'a-b': 1}
+    # Cache hit: the configuration is not flattened again
+    monkeypatch.setattr(config, 'iter_flatten', None)
+    assert config.flatten() == {'a-b': 1}
+
+    # Cache invalidated by reload
+    with open(filename, 'w') as stream:
+        stream.write('a:\n  b: 2\n')
+    config.reload()
+    with pytest.raises(TypeError):
+        config.flatten()
+    monkeypatch.undo()
+    assert config.flatten() == {'a-b': 2}
+    Config.clear()
+
+
+def test_dump_formats(tmpdir):
+    config = Config()
+    shared = {'x': 1}
+    config['a'] = {'list': (1, 2), 'shared1': shared, 'shared2': shared, 'day': datetime.date(2021, 1, 15)}
+
+    assert config.dump() == ("_version: 2\na:\n  day: 2021-01-15\n  list:\n  - 1\n  - 2\n"
+                             "  shared1:\n    x: 1\n  shared2:\n    x: 1\n")
+    assert json.loads(config.dump(fmt='json')) == {
+        '_version': 3, 'a': {'list': [1, 2], 'shared1': {'x': 1}, 'shared2': {'x': 1}, 'day': '2021-01-15'}}
+
+    stream = io.StringIO()
+    assert config.dump(stream=stream) is None
+    assert stream.getvalue().startswith('_version: 4\n')
+
+    filename = str(tmpdir.join('dump.json'))
+    config.dump(filename, fmt='json')
+    with open(filename) as f:
+        assert json.load(f)['_version'] == 5
+
+    with pytest.raises(ValueError):
+        config.dump(fmt='xml')
+    Config.clear()
+
+
+def test_dump_msgpack():
+    msgpack = pytest.importorskip('msgpack')
+    config = Config()
+    config['a'] = {'b': [1, 2]}
+    assert msgpack.unpackb(config.dump(fmt='msgpack'), raw=False) == {'_version': 2, 'a': {'b': [1, 2]}}
+    Config.clear()
+
+
+def test_deferred(tmpdir):
+    filename = str(tmpdir.join('deferred.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('root: &root ${DEFERRED_TEST}/root\n'
+                     'data: !join [*root, /data]\n'
+                     'server:\n  port: 8080\n  hosts:\n    - name: ${DEFERRED_TEST}\n'
+                     'port: ${config:server.port}\n')
+    os.environ['DEFERRED_TEST'] = 'test'
+    config = Config(filename, deferred=True)
+    raw = config.conf.raw
+    assert config['root'] == 'test/root'
+    # Only accessed references are resolved, the parsed tree keeps its placeholders
+    assert 'data' not in config.conf._resolved
+    assert raw['root'] != 'test/root'
+    assert config.conf.data == 'test/root/data'
+    assert config.get_path('server.hosts.0.name') == 'test'
+    assert config['port'] == 8080
+    assert config.flatten()['server-hosts-0-name'] == 'test'
+    # Values follow the environment on reload
+    os.environ['DEFERRED_TEST'] = 'other'
+    assert config['root'] == 'test/root'
+    config.reload()
+    assert config['root'] == 'other/root'
+    Config.clear()
+    with pytest.raises(ValueError):
+        Config(filename, deferred=True, frozen=True)
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_get_instance_threads(datafiles, monkeypatch):
+    filename = os.path.join(datafiles.strpath, 'basic.yaml')
+    loads = []
+    load = ConfigLoader.load
+    monkeypatch.setattr(ConfigLoader, 'load', lambda *args, **kwargs: loads.append(1) or load(*args, **kwargs))
+    barrier = threading.Barrier(8)
+    instances = []
+
+    def get_instance():
+        barrier.wait()
+        instances.append(Config.get_instance(filename))
+
+    threads = [threading.Thread(target=get_instance) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert len(instances) == 8 and all(instance is instances[0] for instance in instances)
+    Config.clear()
+
+
+def test_setitem_copy_on_write():
+    config = Config.get_instance()
+    config['a'] = {'b': 1}
+    before = config.conf
+    config['c'] = 2
+    assert 'c' not in before
+    assert config.conf is not before
+    assert config.conf['a'] is before['a']
+    assert config.conf['c'] == 2
+    assert config.get_path('a.b') == 1
+    Config.clear()
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_aget_instance(datafiles):
+    filename = os.path.join(datafiles.strpath, 'basic.yaml')
+
+    async def get_instances():
+        return await asyncio.gather(*[Config.aget_instance(filename) for _ in range(4)])
+
+    loop = asyncio.new_event_loop()
+    try:
+        instances = loop.run_until_complete(get_instances())
+    finally:
+        loop.close()
+    assert all(instance is Config.get_instance() for instance in instances)
+    assert instances[0]['foo']['bar'] == 1
+    Config.clear()
+
+
+def test_get_many_and_project(tmpdir):
+    filename = str(tmpdir.join('many.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('db:\n  host: ${MANY_TEST}\n  port: 5432\n  items: 3\nhosts:\n  - name: a\n  - name: b\nname: app\n')
+    os.environ['MANY_TEST'] = 'localhost'
+    paths = ['db.host', 'db.port', 'hosts.1.name', 'db.items']
+    for options in ({}, {'deferred': True}, {'frozen': True}):
+        Config.clear()
+        config = Config(filename, **options)
+        assert config.get_many(paths + ['db.missing']) == ['localhost', 5432, 'b', 3, None]
+        assert config.project(paths) == {'db': {'host': 'localhost', 'port': 5432, 'items': 3}, 'hosts': {'1': {'name': 'b'}}}
+        assert config.project({'host': 'db.host', 'port': 'db.port'}, into=dict) == {'host': 'localhost', 'port': 5432}
+        assert config.project(['name', 'db.missing'], default_value=0) == {'name': 'app', 'db': {'missing': 0}}
+        with pytest.raises(KeyError):
+            config.project(['db.missing'])
+
+    # Paths of frozen configurations are indexed once per loaded configuration
+    assert config.get_path('hosts.1.name') == 'b'
+    assert config.get_path('hosts.2', 'default') == 'default'
+    assert config.get_path('db') == {'host': 'localhost', 'port': 5432, 'items': 3}
+    index = config._path_index
+    assert config.get_path('db.port') == 5432
+    assert config._path_index is index
+    with open(filename, 'w') as stream:
+        stream.write('db:\n  port: 6543\n')
+    config.reload()
+    assert config.get_path('db.port') == 6543
+    assert config.get_path('db.host') is None
+    assert config._path_index is not index
+    Config.clear()
+
+
+def test_import_is_lazy():
+    # Modules only needed by some code paths must not be imported with the package
+    code = 'import sys, lincolntools.config; print(" ".join(sorted(m for m in {!r} if m in sys.modules)))'.format(
+        ('asyncio', 'concurrent.futures', 'deepdiff', 'json', 'watchdog'))
+    output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+    assert output.strip() == ''
@@ -4,9 +4,15 @@
 # """Tests for `lincolntools-config` package."""
 
 import os
+import asyncio
+import threading
+import time
 import pytest
 import yaml
 from lincolntools.config import ConfigLoader
+from lincolntools.config import config_loader, discovery, interpolation
+from lincolntools.config.cache import ConfigCache, is_trusted
+from lincolntools.config.config_loader import ChainedReader, PyYamlLoader, CYamlLoader
 
 FIXTURE_DIR = os.path.join(
     os.path.dirname(os.path.realpath(__file__)),
@@ -101,3 +107,251 @@ def test_concatenate_multiple_files(datafiles):
 
     with pytest.raises(yaml.composer.ComposerError):
         config = ConfigLoader.load_from_folder(datafiles.strpath, concatenate=False)
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+def test_load_cached(datafiles, tmpdir, monkeypatch):
+    cache_dir = str(tmpdir.join('cache'))
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    config = ConfigLoader.load_from_folder(datafiles.strpath, cache_dir=cache_dir)
+    assert config == ConfigLoader.load_from_folder(datafiles.strpath)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # Cache hit: files are not parsed again, environment variables are still substituted
+    os.environ['ENV_VALUE_TEST'] = 'other'
+    monkeypatch.setattr(ConfigLoader, 'read_yaml_stream', None)
+    config = ConfigLoader.load_from_folder(datafiles.strpath, cache_dir=cache_dir)
+    assert config['foo']['test_env'] == 'other'
+    assert config['part2']['complex']['data_dir'] == '/path/to/project/data'
+    monkeypatch.undo()
+
+    # Cache miss: a source file changed
+    with open(os.path.join(datafiles.strpath, 'config.yaml'), 'a') as stream:
+        stream.write('\nnew_key: 1\n')
+    config = ConfigLoader.load(datafiles.strpath, cache_dir=cache_dir)
+    assert config.new_key == 1
+    assert config.foo.test_env == 'other'
+    os.environ['ENV_VALUE_TEST'] = 'test'
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'config.yaml')
+)
+def test_load_cached_touched_file(datafiles, tmpdir):
+    cache_dir = str(tmpdir.join('cache'))
+    filename = os.path.join(datafiles.strpath, 'config.yaml')
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    config = ConfigLoader.load_cached(filename, cache_dir)
+    # Same content with a new modification time: the entry is still valid
+    os.utime(filename, ns=(0, 0))
+    assert ConfigLoader.load_cached(filename, cache_dir) == config
+
+
+def test_cache_entries_trust(tmpdir):
+    cache = ConfigCache(str(tmpdir.join('cache')))
+    filename = str(tmpdir.join('config.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('key: 1\n')
+    # The stamp is the one of the content which was read, not of the file modified after the read
+    stamp, content = ConfigCache.read_source(filename)
+    with open(filename, 'w') as stream:
+        stream.write('key: 2\n')
+    os.utime(filename, ns=(0, stamp[2] + 1000))
+    cache.put('key', [filename], {'key': 1}, stamps=[stamp])
+    assert oct(os.stat(cache.cache_dir).st_mode & 0o777) == oct(0o700)
+    assert cache.get('key', [filename]) is None
+    cache.put('key', [filename], {'key': 2})
+    assert cache.get('key', [filename]) == {'key': 2}
+
+    # Entries of a folder other users can write to are not unpickled
+    os.chmod(cache.cache_dir, 0o777)
+    assert cache.get('key', [filename]) is None
+    os.chmod(cache.cache_dir, 0o700)
+    assert is_trusted(cache.cache_dir)
+
+
+def test_resolve_env_placeholders(tmpdir):
+    filename = str(tmpdir.join('env.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('root: &root ${ENV_VALUE_TEST}/root\ndata: !join [*root, /data]\n')
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    config = ConfigLoader.load_from_file(filename, resolve_env=False)
+    assert config['root'] == interpolation.EnvReference('${ENV_VALUE_TEST}/root')
+    assert isinstance(config['data'], interpolation.JoinReference)
+    assert interpolation.resolve(config) == {'root': 'test/root', 'data': 'test/root/data'}
+
+
+def test_interpolation(tmpdir, caplog):
+    filename = str(tmpdir.join('interpolation.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('server:\n'
+                     '  host: ${MISSING_HOST:-localhost}\n'
+                     '  port: 8080\n'
+                     'url: http://${config:server.host}:${config:server.port}/${ENV_VALUE_TEST}\n'
+                     'port: ${config:server.port}\n'
+                     'nested: ${MISSING_A:-${MISSING_B:-${ENV_VALUE_TEST}}}-${ENV_VALUE_TEST}\n'
+                     'missing: a${MISSING_A}b${MISSING_B}c\n'
+                     'missing_key: ${config:server.missing}\n'
+                     'empty: ${EMPTY_VALUE_TEST:-default}/${EMPTY_VALUE_TEST}\n')
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    os.environ['EMPTY_VALUE_TEST'] = ''
+    for name in ('MISSING_HOST', 'MISSING_A', 'MISSING_B'):
+        os.environ.pop(name, None)
+    config = ConfigLoader.load_from_file(filename)
+    assert config['server']['host'] == 'localhost'
+    assert config['url'] == 'http://localhost:8080/test'
+    assert config['port'] == 8080
+    assert config['nested'] == 'test-test'
+    assert config['missing'] == 'abc'
+    assert config['missing_key'] is None
+    # As in bash, the default value is also used when the variable is empty
+    assert config['empty'] == 'default/'
+    # Missing variables are reported in a single warning
+    warnings = [record for record in caplog.records if record.levelname == 'WARNING']
+    assert len(warnings) == 1
+    assert 'MISSING_A, MISSING_B, config:server.missing' in warnings[0].getMessage()
+    assert 'None for a whole value' in warnings[0].getMessage()
+
+
+def test_interpolator_cache():
+    interpolator = interpolation.Interpolator({'A': '1'}, root={'key': [{'value': 2}]})
+    assert interpolator.interpolate('${A}${A}') == '11'
+    assert interpolator.interpolate('${config:key.0.value}') == 2
+    assert interpolator.interpolate('${config:key.1}') is None
+    assert interpolator.missing == {'config:key.1'}
+    # The environment is only read when the interpolator is created
+    interpolator.environ['A'] = '2'
+    assert interpolator.interpolate('${A}${A}') == '11'
+    assert interpolation.parse('${A:-${B}}/${UNTERMINATED') == (('env', 'A', (('env', 'B', None),)), '/${UNTERMINATED')
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+def test_aload(datafiles, monkeypatch):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    loop = asyncio.new_event_loop()
+    try:
+        config = loop.run_until_complete(ConfigLoader.aload(datafiles.strpath))
+        assert config == ConfigLoader.load(datafiles.strpath)
+        filename = os.path.join(datafiles.strpath, 'config.yaml')
+        config = loop.run_until_complete(ConfigLoader.aload(filename, frozen=True))
+        assert config == ConfigLoader.load(filename, frozen=True)
+
+        # The conversion does not run in the event loop thread either
+        wrap = ConfigLoader._wrap
+        threads = []
+
+        def record_wrap(conf, **kwargs):
+            threads.append(threading.current_thread())
+            return wrap(conf, **kwargs)
+        monkeypatch.setattr(ConfigLoader, '_wrap', staticmethod(record_wrap))
+        loop.run_until_complete(ConfigLoader.aload(filename))
+        assert threads and threading.main_thread() not in threads
+
+        def slow_read(file_path):
+            time.sleep(0.5)
+            return b''
+        monkeypatch.setattr(config_loader, '_read_bytes', slow_read)
+        with pytest.raises(asyncio.TimeoutError):
+            loop.run_until_complete(ConfigLoader.aload_from_folder(datafiles.strpath, timeout=0.05))
+    finally:
+        loop.close()
+
+
+def test_find_yaml_files(tmpdir, monkeypatch):
+    for path in ('a.yaml', 'b.yml', 'c.txt', '.hidden.yaml', 'sub/d.yaml', 'sub/deep/e.yaml', 'skip/f.yaml', '.git/g.yaml'):
+        tmpdir.join(path).write('key: 1\n', ensure=True)
+    folder = str(tmpdir)
+
+    def found(**kwargs):
+        return sorted(os.path.relpath(path, folder) for path in ConfigLoader.find_yaml_files(folder, **kwargs))
+
+    assert found() == ['a.yaml', 'b.yml', 'skip/f.yaml', 'sub/d.yaml', 'sub/deep/e.yaml']
+    assert found(max_depth=1) == ['a.yaml', 'b.yml', 'skip/f.yaml', 'sub/d.yaml']
+    assert found(exclude=['skip', '*.yml']) == ['a.yaml', 'sub/d.yaml', 'sub/deep/e.yaml']
+    assert found(include=['sub/*']) == ['sub/d.yaml', 'sub/deep/e.yaml']
+
+    # Unchanged directories are not listed again (recently modified ones are not cached)
+    for dir_path, _, _ in os.walk(folder):
+        os.utime(dir_path, (0, 0))
+    found()
+    scans = []
+    scan_directory = discovery.scan_directory
+    monkeypatch.setattr(discovery, 'scan_directory', lambda path: scans.append(path) or scan_directory(path))
+    found()
+    assert scans == []
+    tmpdir.join('sub', 'new.yaml').write('key: 2\n')
+    assert 'sub/new.yaml' in found()
+    assert scans == [os.path.join(folder, 'sub')]
+
+    # Identity of the files: changes with their content, missing files can be left out
+    a_path, missing = os.path.join(folder, 'a.yaml'), os.path.join(folder, 'missing.yaml')
+    stamp = discovery.file_stamp(a_path)
+    assert discovery.file_stamps([a_path, missing], skip_missing=True) == {a_path: stamp}
+    with pytest.raises(OSError):
+        discovery.file_stamps([a_path, missing])
+    tmpdir.join('a.yaml').write('key: 10\n')
+    assert discovery.file_stamp(a_path) != stamp
+
+
+@pytest.mark.skipif(CYamlLoader is None, reason='libyaml is not available')
+@pytest.mark.parametrize('filename', [
+    os.path.join('basic.yaml'),
+    os.path.join('configs_sample', 'config.yaml'),
+    os.path.join('configs_sample', 'part2', 'config_part2.yaml'),
+    os.path.join('configs_sample', 'with_difference', 'diff.yaml'),
+])
+def test_c_loader_equivalence(filename):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    path = os.path.join(FIXTURE_DIR, 'configs', filename)
+    with open(path) as stream:
+        expected = ConfigLoader.read_yaml_stream(stream, loader_class=PyYamlLoader)
+    with open(path) as stream:
+        assert ConfigLoader.read_yaml_stream(stream, loader_class=CYamlLoader) == expected
+
+
+def test_global_loader_untouched():
+    ConfigLoader.load_from_file(os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml'))
+    assert '!join' not in yaml.SafeLoader.yaml_constructors
+    assert '!env_var' not in yaml.SafeLoader.yaml_constructors
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_read_folder_parallel(datafiles, max_workers):
+    os.remove(os.path.join(datafiles.strpath, 'concat', 'concat_2.yaml'))
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    config = ConfigLoader.load_from_folder_parallel(datafiles.strpath, max_workers=max_workers)
+    assert config == ConfigLoader.load_from_folder(datafiles.strpath)
+    assert config['foo']['test_env'] == 'test'
+    assert config['part2']['complex']['subproject_data_dir'] == '/path/to/project/subproject/data'
+
+    with pytest.raises(ValueError):
+        ConfigLoader.load_from_folder_parallel(datafiles.strpath, max_workers=0)
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'concat')
+)
+def test_chained_reader(datafiles):
+    filenames = sorted(str(f) for f in datafiles.listdir())
+    expected = b''
+    for filename in filenames:
+        with open(filename, 'rb') as stream:
+            expected += stream.read()
+    with ChainedReader(filenames) as stream:
+        assert stream.read(10) == expected[:10]
+        assert stream.read() == expected[10:]
+        assert stream.read() == b''
+    with ChainedReader([]) as stream:
+        assert stream.read() == b''
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import pickle
+import pytest
+
+from lincolntools.config import Config, ConfigLoader
+from lincolntools.config.frozen import FrozenDict, freeze
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+def test_frozen_dict():
+    shared = {'x': 1}
+    conf = freeze({'a': {'b': [1, {'c': 2}]}, 'shared1': shared, 'shared2': shared, 'items': 3})
+
+    assert conf['a']['b'][1]['c'] == 2
+    assert conf.a.b[1].c == 2
+    assert conf['items'] == 3
+    assert isinstance(conf.a, FrozenDict)
+    assert conf.a.b == (1, {'c': 2})
+    assert conf.shared1 is conf.shared2
+    assert conf == {'a': {'b': (1, {'c': 2})}, 'shared1': {'x': 1}, 'shared2': {'x': 1}, 'items': 3}
+    assert conf.thaw() == {'a': {'b': [1, {'c': 2}]}, 'shared1': {'x': 1}, 'shared2': {'x': 1}, 'items': 3}
+
+    with pytest.raises(AttributeError):
+        conf.missing
+    with pytest.raises(TypeError):
+        conf['a'] = 1
+    with pytest.raises(TypeError):
+        conf.a = 1
+
+    assert hash(conf) == hash(freeze(conf.thaw()))
+    assert {conf: 1}[freeze(conf.thaw())] == 1
+    assert pickle.loads(pickle.dumps(conf)) == conf
+
+    updated = conf.updated(a=2)
+    assert updated.a == 2
+    assert conf.a.b[0] == 1
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+def test_load_frozen(datafiles):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    conf = ConfigLoader.load(datafiles.strpath, frozen=True)
+    assert isinstance(conf, FrozenDict)
+    assert conf.thaw() == ConfigLoader.load_from_folder(datafiles.strpath)
+    assert conf.part2.complex.data_dir == '/path/to/project/data'
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_config_frozen(datafiles):
+    filenames = [str(f) for f in datafiles.listdir()]
+    config = Config(filenames[0], frozen=True)
+    assert config['_version'] == 1
+    assert config['foo'].bar == 1
+    assert config.get_path('foo.baz') == 2
+    assert config.flatten() == {'foo-bar': 1, 'foo-baz': 2}
+    with pytest.raises(TypeError):
+        config['foo'] = 1
+
+    assert config.dump() == '_version: 2\nfoo:\n  bar: 1\n  baz: 2\n'
+    config.reload()
+    assert config['_version'] == 3
+    assert isinstance(config.conf, FrozenDict)
+    Config.clear()
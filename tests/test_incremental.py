@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import pytest
+
+from lincolntools.config import Config, ConfigLoader
+from lincolntools.config.incremental import IncrementalLoader
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+def write(path, content):
+    with open(path, 'w') as stream:
+        stream.write(content)
+    # Same size content written in the same tick must still be seen as a change
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1000))
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part1'),
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part2'),
+)
+def test_incremental_reload(datafiles):
+    loader = IncrementalLoader(datafiles.strpath)
+    conf = loader.load()
+    assert conf == ConfigLoader.load_from_folder(datafiles.strpath)
+    assert loader.reparsed_count == 2
+
+    assert loader.load() == conf
+    assert loader.reparsed_count == 0
+
+    # New file which overrides a key of another one
+    write(os.path.join(datafiles.strpath, 'z_override.yaml'), 'part1:\n    port: 1\nnew: 2\n')
+    conf = loader.load()
+    assert loader.reparsed_count == 1
+    assert conf['part1'] == {'port': 1}
+    assert conf['new'] == 2
+    assert loader.owners('part1') == [os.path.join(datafiles.strpath, 'config_part1.yaml'),
+                                      os.path.join(datafiles.strpath, 'z_override.yaml')]
+
+    # Removed file: the overridden value is back
+    os.remove(os.path.join(datafiles.strpath, 'z_override.yaml'))
+    conf = loader.load()
+    assert loader.reparsed_count == 0
+    assert conf['part1']['port'] == 12345
+    assert 'new' not in conf
+    assert conf == ConfigLoader.load_from_folder(datafiles.strpath)
+
+
+def test_incremental_cross_file_references(tmpdir):
+    write(str(tmpdir.join('a.yaml')), 'server:\n    host: h1\n')
+    write(str(tmpdir.join('b.yaml')), 'url: http://${config:server.host}/x\n')
+    loader = IncrementalLoader(str(tmpdir))
+    assert loader.load()['url'] == 'http://h1/x'
+
+    # Only the referenced file changed: the reference is resolved again
+    write(str(tmpdir.join('a.yaml')), 'server:\n    host: h2\n')
+    assert loader.load()['url'] == 'http://h2/x'
+    assert loader.reparsed_count == 1
+    assert loader.load() == ConfigLoader.load_from_folder(str(tmpdir))
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'concat')
+)
+def test_incremental_fallback(datafiles, caplog):
+    loader = IncrementalLoader(datafiles.strpath)
+    conf = loader.load()
+    assert loader.incremental is False
+    # The fallback is expected: no error is logged
+    assert not [record for record in caplog.records if record.levelname == 'ERROR']
+    assert conf == ConfigLoader.load_from_folder(datafiles.strpath)
+
+    loader.load()
+    assert loader.reparsed_count == 0
+
+    write(os.path.join(datafiles.strpath, 'concat_2.yaml'), 'concat2:\n    other_dir: !join [*project_dir_concat, /new]\n')
+    conf = loader.load()
+    assert loader.reparsed_count == 2
+    assert conf['concat2']['other_dir'] == '/path/to/project/new'
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part1')
+)
+def test_config_incremental(datafiles):
+    config = Config(datafiles.strpath, incremental=True)
+    assert config.reparsed_count == 1
+    write(os.path.join(datafiles.strpath, 'config_part1.yaml'), 'part1:\n    port: 1\n')
+    config.reload()
+    assert config.reparsed_count == 1
+    assert config['part1'].port == 1
+    assert config['_version'] == 2
+    Config.clear()
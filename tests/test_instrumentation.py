@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import json
+import pytest
+
+from lincolntools.config import Config, ConfigLoader
+from lincolntools.config import instrumentation
+from lincolntools.config.__main__ import main
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+def test_profile_hook(datafiles):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    profiles = []
+    # Loads are not profiled without hook
+    with instrumentation.profiling(datafiles.strpath) as profile:
+        assert profile is None
+    instrumentation.add_hook(profiles.append)
+    try:
+        ConfigLoader.load(datafiles.strpath)
+    finally:
+        instrumentation.remove_hook(profiles.append)
+    assert len(profiles) == 1
+    profile = profiles[0]
+    assert profile.path == datafiles.strpath
+    yaml_files = ConfigLoader.find_yaml_files(datafiles.strpath)
+    assert sorted(profile.files) == sorted(yaml_files)
+    assert profile.bytes == sum(os.path.getsize(path) for path in yaml_files)
+    for name in ('discovery', 'read', 'parse', 'interpolation', 'conversion'):
+        assert profile.phases[name] > 0
+    # Phases are exclusive: their sum cannot exceed the whole load
+    assert sum(profile.phases.values()) <= profile.total
+    assert instrumentation.current() is None
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'config.yaml'),
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'config.template'),
+)
+def test_config_profile(datafiles, capsys):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    filename = os.path.join(datafiles.strpath, 'config.yaml')
+    config = Config(filename, profile=True, schema=os.path.join(datafiles.strpath, 'config.template'))
+    profile = config.last_profile
+    assert profile.files[filename]['parse'] > 0
+    assert profile.phases['validation'] > 0
+    config.reload()
+    assert config.last_profile is not profile
+    Config.clear()
+
+    assert main(['profile', filename, '--json']) == 0
+    measures = json.loads(capsys.readouterr().out)
+    assert list(measures['files']) == [filename]
+    assert main(['profile', filename]) == 0
+    assert 'parse' in capsys.readouterr().out
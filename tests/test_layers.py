@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import pytest
+
+from lincolntools.config import Config
+from lincolntools.config.layers import LayeredConfig, merge
+
+
+def write(path, content):
+    with open(path, 'w') as stream:
+        stream.write(content)
+    # Same size content written in the same tick must still be seen as a change
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1000))
+
+
+def test_merge():
+    base = {'db': {'host': 'localhost', 'port': 5432, 'options': {'timeout': 1}}, 'hosts': [1, 2]}
+    override = {'db': {'host': 'prod', 'options': {'retries': 3}}, 'hosts': [3]}
+    assert merge(base, override) == {'db': {'host': 'prod', 'port': 5432, 'options': {'timeout': 1, 'retries': 3}},
+                                     'hosts': [3]}
+    # A value which is not a mapping replaces the whole subtree
+    assert merge(base, {'db': None}) == {'db': None, 'hosts': [1, 2]}
+    assert base['db']['host'] == 'localhost'
+
+
+def test_layered_config():
+    layered = LayeredConfig()
+    layered.set_layer('base', {'db': {'host': 'localhost', 'port': 5432}, 'debug': False})
+    layered.set_layer('environment', {'db': {'host': 'prod'}})
+    assert layered.conf == {'db': {'host': 'prod', 'port': 5432}, 'debug': False}
+    assert layered.source('db.host') == 'environment'
+    assert layered.sources() == {'db.host': 'environment', 'db.port': 'base', 'debug': 'base'}
+
+    # Only the changed subtrees are merged again
+    assert layered.set('db.port', 6543) == [('db', 'port')]
+    assert layered.source(('db', 'port')) == 'runtime'
+    assert layered.set_layer('base', {'db': {'host': 'localhost', 'port': 5432}, 'debug': True}) == [('debug',)]
+    assert layered.conf == {'db': {'host': 'prod', 'port': 6543}, 'debug': True}
+
+    # Values of the lower layers are back when an override is removed
+    # The emptied mapping of the layer is removed as well: its path is merged again
+    assert layered.unset('db.port') == [('db',)]
+    assert layered.layer('runtime') == {}
+    assert layered.unset('db.missing') == []
+    assert layered.conf['db']['port'] == 5432
+    layered.set('db.options.ssl', True)
+    layered.set('db.host', 'local')
+    assert layered.unset('db.options.ssl') == [('db', 'options')]
+    assert layered.layer('runtime') == {'db': {'host': 'local'}}
+    layered.set_layer('runtime', {})
+
+    # An emptied mapping does not hide a value of a lower layer
+    layered.set_layer('environment', {'db': 'sqlite'})
+    layered.set('db.host', 'other')
+    assert layered.conf['db'] == {'host': 'other'}
+    assert layered.unset('db.host') == [('db',)]
+    assert layered.conf['db'] == 'sqlite'
+    layered.set_layer('environment', {'db': {'host': 'prod'}})
+
+    # Lists are replaced as a whole
+    layered.set_layer('base', {'db': {'host': 'localhost', 'port': 5432}, 'debug': True, 'hosts': ['a', 'b']})
+    with pytest.raises(ValueError):
+        layered.set('hosts.0', 'c')
+    with pytest.raises(ValueError):
+        layered.set(('hosts', 0, 'name'), 'c')
+    assert layered.layer('runtime') == {}
+    layered.set('hosts', ['c'])
+    with pytest.raises(ValueError):
+        layered.set('hosts.0', 'd')
+    assert layered.conf['hosts'] == ['c']
+    layered.set_layer('base', {'db': {'host': 'localhost', 'port': 5432}, 'debug': True})
+    layered.set_layer('runtime', {})
+    layered.set_layer('environment', {'db': 'sqlite'})
+    assert layered.conf == {'db': 'sqlite', 'debug': True}
+    layered.set_layer('environment', {})
+    assert layered.conf == {'db': {'host': 'localhost', 'port': 5432}, 'debug': True}
+
+    with pytest.raises(KeyError):
+        layered.source('db')
+    with pytest.raises(KeyError):
+        layered.set('a', 1, layer='unknown')
+
+
+def test_config_layers(tmpdir):
+    Config.clear()
+    base = tmpdir.join('base.yaml')
+    local = tmpdir.join('local.yaml')
+    write(str(base), 'db:\n    host: localhost\n    port: 5432\nname: app\n')
+    write(str(local), 'db:\n    port: 6543\n')
+
+    config = Config(str(base), layers=[str(local)])
+    assert config['db'] == {'host': 'localhost', 'port': 6543}
+    assert config.conf.name == 'app'
+    assert config.layered.source('db.port') == str(local)
+
+    write(str(local), 'db:\n    port: 7654\n')
+    config.reload()
+    assert config.layered.remerged_count == 1
+    assert config['db'] == {'host': 'localhost', 'port': 7654}
+    assert config['_version'] == 2
+
+    # Runtime overrides are published and kept across reloads
+    versions = []
+    config.add_change_callback(lambda config: versions.append(config['_version']))
+    config.set_override('db.host', 'prod')
+    assert config['db'] == {'host': 'prod', 'port': 7654}
+    assert config.get_path('db.host') == 'prod'
+    assert config.layered.source('db.host') == Config.RUNTIME_LAYER
+    write(str(local), 'db:\n    port: 8765\n')
+    config.reload()
+    assert config['db'] == {'host': 'prod', 'port': 8765}
+    config.unset_override('db.host')
+    config.unset_override('db.missing')
+    assert config['db'] == {'host': 'localhost', 'port': 8765}
+    assert versions == [3, 4, 5]
+    Config.clear()
+
+    with pytest.raises(ValueError):
+        Config(str(base)).set_override('db.host', 'prod')
+    Config.clear()
+    with pytest.raises(ValueError):
+        Config(str(base), layers=[str(local)], lazy=True)
+    Config.clear()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import pytest
+
+from lincolntools.config import Config, ConfigLoader
+from lincolntools.config.lazy import LazyConfig, scan_top_level_keys
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+def test_scan_top_level_keys(tmpdir):
+    filename = str(tmpdir.join('keys.yaml'))
+    with open(filename, 'w') as stream:
+        stream.write('---\n# comment: no\nfirst: 1\nsecond:\n    nested: 2\n"quoted key" : 3\n'
+                     'text: |\n    inside: no\nurl: http://host:80  # comment\n- not: a key\n')
+    assert scan_top_level_keys(filename) == ['first', 'second', 'quoted key', 'text', 'url']
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+def test_lazy_config(datafiles):
+    os.remove(os.path.join(datafiles.strpath, 'concat', 'concat_2.yaml'))
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    conf = LazyConfig(datafiles.strpath)
+    assert conf.parsed_files == []
+    assert 'part1' in conf
+    assert conf.parsed_files == []
+
+    assert conf['part1']['port'] == 12345
+    assert conf.part1.port == 12345
+    assert conf.parsed_files == [os.path.join(datafiles.strpath, 'part1', 'config_part1.yaml')]
+
+    assert conf['foo']['test_env'] == 'test'
+    assert len(conf.parsed_files) == 2
+
+    conf['new'] = 1
+    assert conf['new'] == 1
+    del conf['mode']
+    assert 'mode' not in conf
+    with pytest.raises(KeyError):
+        conf['missing']
+
+    expected = ConfigLoader.load_from_folder(datafiles.strpath)
+    del expected['mode']
+    expected['new'] = 1
+    assert dict(conf) == expected
+
+
+def test_lazy_config_overrides(tmpdir):
+    with open(str(tmpdir.join('a.yaml')), 'w') as stream:
+        stream.write('section:\n    value: 1\nother: 1\n')
+    with open(str(tmpdir.join('b.yaml')), 'w') as stream:
+        stream.write('section:\n    value: 2\n')
+    conf = LazyConfig(str(tmpdir))
+    assert conf['section']['value'] == 2
+    assert len(conf.parsed_files) == 2
+
+
+def test_lazy_config_merge_keys(tmpdir):
+    with open(str(tmpdir.join('a.yaml')), 'w') as stream:
+        stream.write('defaults: &defaults\n    x: 1\n    y: 2\n<<: *defaults\nz: 3\n')
+    with open(str(tmpdir.join('b.yaml')), 'w') as stream:
+        stream.write('y: 4\n')
+    assert scan_top_level_keys(str(tmpdir.join('a.yaml'))) == ['defaults', 'z']
+    conf = LazyConfig(str(tmpdir))
+    # The file with a merge key is parsed at creation, the merged keys are visible
+    assert conf.parsed_files == [str(tmpdir.join('a.yaml'))]
+    assert 'x' in conf and '<<' not in conf
+    assert conf['y'] == 4
+    conf.load_all()
+    assert dict(conf) == ConfigLoader.load_from_folder(str(tmpdir))
+
+    # Merged anchor defined in another file: the whole folder is loaded
+    with open(str(tmpdir.join('c.yaml')), 'w') as stream:
+        stream.write('<<: *defaults\nw: 5\n')
+    conf = LazyConfig(str(tmpdir))
+    assert sorted(conf) == ['defaults', 'w', 'x', 'y', 'z']
+    assert dict(conf) == ConfigLoader.load_from_folder(str(tmpdir))
+
+
+def test_lazy_config_cross_file_references(tmpdir):
+    with open(str(tmpdir.join('a.yaml')), 'w') as stream:
+        stream.write('server:\n    host: h1\nloop: ${config:cycle.value}\n')
+    with open(str(tmpdir.join('b.yaml')), 'w') as stream:
+        stream.write('url: http://${config:server.host}/x\ncycle:\n    value: ${config:loop}\n')
+    conf = LazyConfig(str(tmpdir))
+    assert conf['url'] == 'http://h1/x'
+    with pytest.raises(ValueError):
+        conf['loop']
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'concat')
+)
+def test_lazy_config_cross_file_anchors(datafiles):
+    conf = LazyConfig(datafiles.strpath)
+    assert conf['concat2']['other_dir'] == '/path/to/project/other'
+    assert dict(conf) == ConfigLoader.load_from_folder(datafiles.strpath)
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part1'),
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part2'),
+)
+def test_config_lazy(datafiles):
+    config = Config(datafiles.strpath, lazy=True)
+    assert config['_version'] == 1
+    assert config.get_path('part1.port') == 12345
+    assert config.conf.parsed_files == [os.path.join(datafiles.strpath, 'config_part1.yaml')]
+    assert config.flatten()['part2-classic-project_dir'] == '/path/to/project'
+    Config.clear()
+
+    with pytest.raises(ValueError):
+        Config(datafiles.strpath, lazy=True, incremental=True)
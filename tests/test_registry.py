@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import asyncio
+import os
+import threading
+import time
+import pytest
+
+from lincolntools.config import Config
+from lincolntools.config.registry import DEFAULT_MAX_SIZE, InstanceRegistry, estimate_size
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+class Instance():
+
+    def __init__(self, name, size=1):
+        self.name = name
+        self.size = size
+        self.stopped = False
+
+    def stop_watching(self):
+        self.stopped = True
+
+
+def test_registry_lru():
+    registry = InstanceRegistry(max_size=2)
+    a = registry.get('a', lambda: Instance('a'))
+    registry.get('b', lambda: Instance('b'))
+    assert registry.get('a', lambda: Instance('other')) is a
+    registry.get('c', lambda: Instance('c'))
+    # b was the least recently used one
+    assert registry.names() == ['a', 'c']
+    stats = registry.stats()
+    assert (stats['hits'], stats['misses'], stats['evicted_size'], stats['size']) == (1, 3, 1, 2)
+
+    assert registry.remove('a')
+    assert a.stopped
+    assert 'a' not in registry
+
+
+def test_registry_memory_and_ttl():
+    registry = InstanceRegistry(max_memory=10, size_of=lambda instance: instance.size)
+    registry.get('a', lambda: Instance('a', 4))
+    registry.get('b', lambda: Instance('b', 4))
+    registry.get('c', lambda: Instance('c', 4))
+    assert registry.names() == ['b', 'c']
+    assert registry.stats()['evicted_memory'] == 1
+    assert registry.stats()['memory'] == 8
+
+    registry = InstanceRegistry(ttl=0.05)
+    a = registry.get('a', lambda: Instance('a'))
+    assert registry.peek('a') is a
+    time.sleep(0.1)
+    assert registry.peek('a') is None
+    assert registry.get('a', lambda: Instance('a')) is not a
+    assert a.stopped
+    assert registry.stats()['expired'] == 1
+
+
+def test_registry_shared_load():
+    registry = InstanceRegistry()
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def load():
+        loads.append(1)
+        started.set()
+        release.wait(5)
+        return Instance('a')
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('a', load))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while registry.stats()['shared_loads'] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+
+    def fail():
+        raise OSError('unreadable')
+
+    with pytest.raises(OSError):
+        registry.get('b', fail)
+    assert 'b' not in registry
+    assert registry.stats()['failures'] == 1
+
+
+def test_estimate_size():
+    shared = ['x' * 1000]
+    assert estimate_size({'a': shared, 'b': shared}) < estimate_size({'a': shared, 'b': ['y' * 1000]})
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_named_instances(datafiles, monkeypatch):
+    Config.clear()
+    Config.registry.clear()
+    # The default registry is bounded
+    assert Config.registry.max_size == DEFAULT_MAX_SIZE
+    filename = os.path.join(datafiles.strpath, 'basic.yaml')
+    tenant1 = Config.get_instance(name='tenant1', cfg_path=filename)
+    tenant2 = Config.get_instance(filename, name='tenant2', frozen=True)
+    assert tenant1 is not tenant2
+    assert tenant1.name == 'tenant1'
+    assert Config.get_instance(name='tenant1') is tenant1
+    # A registered instance is returned by the coroutine without going through the executor
+    loop = asyncio.new_event_loop()
+    try:
+        monkeypatch.setattr(loop, 'run_in_executor', None)
+        assert loop.run_until_complete(Config.aget_instance(name='tenant1')) is tenant1
+    finally:
+        loop.close()
+    assert tenant2['foo']['bar'] == 1
+    # The singleton is independent of the named instances
+    assert Config._instance is None
+    singleton = Config(filename)
+    assert Config.get_instance() is singleton
+    Config.clear()
+    Config.registry.clear()
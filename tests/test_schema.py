@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import pytest
+
+from lincolntools.config import Config, ConfigLoader
+from lincolntools.config.schema import Schema, SchemaError
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+def test_compiled_schema():
+    schema = Schema.compile({
+        'server': {'host': 'str', 'port': 'int(1, 65535)', 'debug': 'bool?'},
+        'ratio': 'float(0, 1)',
+        'tags': 'list(1,)',
+        'extra?': {'name': 'str'},
+    })
+    conf = {'server': {'host': 'localhost', 'port': 8080}, 'ratio': 1, 'tags': ['a']}
+    assert schema.validate(conf) == []
+    schema.check(conf)
+
+    conf = {'server': {'host': 1, 'port': 0, 'debug': 'yes'}, 'tags': [], 'extra': {}}
+    assert schema.validate(conf) == [
+        ('server.host', 'expected str, got int'),
+        ('server.port', '0 is lower than the minimum 1'),
+        ('server.debug', 'expected bool, got str'),
+        ('ratio', 'missing required key'),
+        ('tags', '0 is lower than the minimum 1'),
+        ('extra.name', 'missing required key'),
+    ]
+    with pytest.raises(SchemaError) as error:
+        schema.check(conf)
+    assert len(error.value.errors) == 6
+
+    assert schema.validate({'server': {'host': 'h', 'port': True}, 'ratio': 2.5, 'tags': [1]}) == [
+        ('server.port', 'expected int, got bool'),
+        ('ratio', '2.5 is greater than the maximum 1'),
+    ]
+    assert schema.validate([]) == [('', 'expected dict, got list')]
+
+    with pytest.raises(ValueError):
+        Schema.compile({'key': 'integer'})
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'config.template'),
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'config.yaml'),
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'with_difference', 'diff.template'),
+)
+def test_template_schema(datafiles):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    template_path = os.path.join(datafiles.strpath, 'config.template')
+    schema = Schema.from_file(template_path)
+    assert Schema.from_file(template_path) is schema
+
+    conf = ConfigLoader.load(os.path.join(datafiles.strpath, 'config.yaml'))
+    assert schema.validate(conf) == []
+    # Inferred numbers may come from environment variables (ex: `int: ${PORT}`)
+    conf['data']['int'] = '42'
+    assert schema.validate(conf) == []
+    conf['data']['int'] = 'one'
+    del conf['data']['dict']['from']
+    assert schema.validate(conf) == [('data.int', 'expected number, got str'), ('data.dict.from', 'missing required key')]
+
+    # Type names used as template values
+    schema = Schema.from_file(os.path.join(datafiles.strpath, 'diff.template'))
+    assert schema.validate({'mode': 'dev', 'zfoo': {'zbar': 'a', 'zbaz': 'b'}, 'config_only': {'hello': 'x'}}) == [
+        ('zfoo.zbaz', 'expected int, got str')]
+
+    # Modified file: compiled again
+    with open(template_path, 'a') as stream:
+        stream.write('new: <1>\n')
+    assert Schema.from_file(template_path).validate(conf)[-1] == ('new', 'missing required key')
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_config_schema(datafiles):
+    filename = os.path.join(datafiles.strpath, 'basic.yaml')
+    schema = Schema.compile({'foo': {'bar': 'int', 'baz': 'int(0, 10)'}})
+    config = Config(filename, schema=schema)
+    with open(filename, 'w') as stream:
+        stream.write('foo:\n    bar: 1\n    baz: 20\n')
+    with pytest.raises(SchemaError):
+        config.reload()
+    assert config['foo']['baz'] == 2
+    Config.clear()
+
+    with pytest.raises(SchemaError):
+        Config(filename, schema=schema)
+    Config.clear()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import multiprocessing
+import threading
+import types
+import pytest
+
+from lincolntools.config import Config, ConfigLoader
+from lincolntools.config.frozen import FrozenDict, thaw
+from lincolntools.config.shared import SharedConfig, publish
+from lincolntools.config.watcher import _wakes_up
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+def _read_port(shared_path):
+    conf = SharedConfig(shared_path)
+    return conf['part1']['port'], conf.decoded_keys
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+def test_shared_config(datafiles, tmpdir):
+    os.environ['ENV_VALUE_TEST'] = 'test'
+    shared_path = str(tmpdir.join('config.shared'))
+    expected = ConfigLoader.load_from_folder(datafiles.strpath)
+    publish(expected, shared_path)
+
+    conf = SharedConfig(shared_path)
+    assert conf.decoded_keys == []
+    assert 'part1' in conf
+    assert conf.part1.port == 12345
+    assert isinstance(conf['part1'], FrozenDict)
+    assert conf.decoded_keys == ['part1']
+    assert thaw(conf) == expected
+
+    # Another process attaches the published file and only decodes what it reads
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        assert pool.apply(_read_port, (shared_path,)) == (12345, ['part1'])
+
+    with open(str(tmpdir.join('other')), 'wb') as stream:
+        stream.write(b'not published')
+    with pytest.raises(ValueError):
+        SharedConfig(str(tmpdir.join('other')))
+
+    # Keys assigned or removed in a process only change its memory
+    conf['added'] = 1
+    del conf['part2']
+    assert 'part2' not in conf and conf.added == 1
+    assert len(conf) == len(expected)
+    assert 'part2' in SharedConfig(shared_path)
+
+    # Other users could have replaced the published sections
+    if hasattr(os, 'getuid'):
+        os.chmod(shared_path, 0o666)
+        with pytest.raises(ValueError):
+            SharedConfig(shared_path)
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'basic.yaml')
+)
+def test_config_shared(datafiles, tmpdir):
+    shared_path = str(tmpdir.join('config.shared'))
+    filename = os.path.join(datafiles.strpath, 'basic.yaml')
+    config = Config(filename)
+    config.publish(shared_path)
+    expected = dict(config.conf)
+    Config.clear()
+
+    config = Config(shared_path=shared_path)
+    assert config['_version'] == 1
+    assert thaw(config.conf) == expected
+    assert config.get_path('foo.baz') == 2
+    # A new publication is attached on reload
+    publish(dict(expected, added=1), shared_path)
+    config.reload()
+    assert config['added'] == 1
+    assert config['_version'] == 2
+    Config.clear()
+
+    with pytest.raises(ValueError):
+        Config(shared_path=shared_path, lazy=True)
+
+
+@pytest.mark.parametrize('use_polling', [True, False])
+def test_watch_shared(tmpdir, use_polling):
+    if not use_polling:
+        pytest.importorskip('watchdog')
+    shared_path = str(tmpdir.join('config.shared'))
+    publish({'key': 1}, shared_path)
+    config = Config(shared_path=shared_path)
+    reloaded = threading.Event()
+    config.add_change_callback(lambda c: c['key'] == 2 and reloaded.set())
+    config.watch(interval=0.05, use_polling=use_polling)
+    try:
+        assert config._watcher.use_polling is use_polling
+        # The published file is not a YAML file: its replacement must still be seen
+        publish({'key': 2}, shared_path)
+        assert reloaded.wait(5)
+        assert config['key'] == 2
+    finally:
+        Config.clear()
+
+
+def test_watcher_wake_up(tmpdir):
+    watched_file = str(tmpdir.join('config.shared'))
+    other = str(tmpdir.join('other.shared'))
+
+    def event(src_path, dest_path='', is_directory=False):
+        return types.SimpleNamespace(src_path=src_path, dest_path=dest_path, is_directory=is_directory)
+
+    assert _wakes_up(event(str(tmpdir.join('a.yaml'))))
+    assert _wakes_up(event(str(tmpdir), is_directory=True))
+    assert not _wakes_up(event(other))
+    assert not _wakes_up(event(other), watched_file)
+    assert _wakes_up(event(watched_file), watched_file)
+    assert _wakes_up(event(watched_file + '.1.tmp', watched_file), watched_file)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# #!/usr/bin/env python
+
+# """Tests for `lincolntools-config` package."""
+
+import os
+import pytest
+
+from lincolntools.config.templates import check_folder_templates, missing_keys
+
+FIXTURE_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    'data',
+)
+
+
+def test_missing_keys():
+    config = {'a': {'b': 1, 'c': {'d': 1}}, 'e': 1, 'f': [{'g': 1}]}
+    template = {'a': {'b': '<int>'}, 'f': '<list>'}
+    assert missing_keys(config, template) == ["root['a']['c']", "root['e']"]
+    assert missing_keys(template, config) == []
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample')
+)
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_check_folder_templates(datafiles, max_workers):
+    with open(os.path.join(datafiles.strpath, 'broken.yaml'), 'w') as stream:
+        stream.write('broken: [\n')
+    with open(os.path.join(datafiles.strpath, 'broken.template'), 'w') as stream:
+        stream.write('broken: <list>\n')
+
+    report = check_folder_templates(datafiles.strpath, max_workers=max_workers)
+    path = datafiles.strpath
+    assert len(report.checked) == 5
+    assert sorted(report.missing_templates) == [os.path.join(path, 'concat', 'concat_1.yaml'),
+                                                os.path.join(path, 'concat', 'concat_2.yaml')]
+    assert report.mismatches == {
+        os.path.join(path, 'part2', 'config_part2.yaml'): ["root['part2']['classic']", "root['part2']['complex']"],
+        os.path.join(path, 'with_difference', 'diff.yaml'): ["root['only']"],
+    }
+    assert list(report.errors) == [os.path.join(path, 'broken.yaml')]
+    assert report.ok is False
+    with pytest.raises(ValueError):
+        report.raise_for_mismatches()
+
+
+@pytest.mark.filterwarnings("ignore:MarkInfo")
+@pytest.mark.datafiles(
+    os.path.join(FIXTURE_DIR, 'configs', 'configs_sample', 'part1')
+)
+def test_check_folder_templates_ok(datafiles):
+    report = check_folder_templates(datafiles.strpath)
+    assert report.ok
+    report.raise_for_mismatches()